@@ -0,0 +1,112 @@
+"""
+Per ball cost of flattening an innings, the parser objects per ball against InningsFlattener,
+with and without building the ORM objects. The loader used to build a model per ball when
+reading and copy it before preprocessing ('parsers + models + copy'), it now builds the insert
+parameters from each row, ids resolved and labels encoded ('flattener + rows'). Run from the
+repository root:
+
+    python -m benchmarks.parsers [scoresheet.yaml ...]
+
+Without files a synthetic 300 ball innings is used.
+"""
+import sys
+import timeit
+
+import yaml
+
+from cricket_db.models import Delivery, Wicket, Player, Innings
+from cricket_db.utils import Utils
+from cricket_db.innings_state import InningsStateTracker
+from cricket_db.parsers.delivery import DeliveryParser
+from cricket_db.parsers.wicket import WicketParser
+from cricket_db.parsers.flatten import InningsFlattener, DeliveryRow
+from cricket_db.dump import DumpCricketDB
+
+ENSURE_LIST = lambda x: [x] if not isinstance(x, list) else x
+PARTITION = {'match_type': 'ODI', 'season': 2019}
+
+
+def synthetic_innings(balls=300):
+    deliveries = []
+    for number in range(balls):
+        raw = {'batsman': f'Batsman {number % 11}', 'bowler': f'Bowler {number % 5}',
+               'non_striker': f'Batsman {(number + 1) % 11}',
+               'runs': {'batsman': number % 7, 'extras': 0, 'total': number % 7}}
+        if number % 17 == 0:
+            raw['extras'] = {'wides': 1}
+            raw['runs'] = {'batsman': 0, 'extras': 1, 'total': 1}
+        if number % 29 == 0:
+            raw['wicket'] = {'kind': 'caught', 'player_out': raw['batsman'], 'fielders': ['Fielder']}
+        deliveries.append({f'{number // 6}.{number % 6 + 1}': raw})
+    return deliveries
+
+
+def scoresheet_innings(file_names):
+    for file_name in file_names:
+        with open(file_name) as stream:
+            raw = yaml.safe_load(stream)
+        for innings in ENSURE_LIST(raw['innings']):
+            yield next(iter(innings.values()))['deliveries']
+
+
+def parsers(deliveries, models=False):
+    """ The loop of the reader before InningsFlattener """
+    objects = []
+    innings_state = InningsStateTracker(50)
+    for delivery in ENSURE_LIST(deliveries):
+        delivery_first_key = next(iter(delivery))
+        over_number, ball_number = int(str(delivery_first_key).split('.')[0]), int(str(delivery_first_key).split('.')[1])
+        raw_delivery = delivery[delivery_first_key]
+        raw_wickets = ENSURE_LIST(raw_delivery['wicket']) if 'wicket' in raw_delivery else []
+        delivery_parse_result = DeliveryParser(1, 1, over_number, ball_number).parse(raw_delivery)
+        delivery_parse_result.update(innings_state.update(over_number, delivery_parse_result['runs_total'],
+                                                          delivery_parse_result.get('extras_type'),
+                                                          [wicket['kind'] for wicket in raw_wickets]))
+        delivery_parse_result.update(PARTITION)
+        objects.append(Delivery(**delivery_parse_result) if models else delivery_parse_result)
+        for wicket in raw_wickets:
+            wicket_parse_result = WicketParser(1, 1, over_number, ball_number).parse(wicket)
+            objects.append(Wicket(**wicket_parse_result, **PARTITION) if models else wicket_parse_result)
+    return objects
+
+
+def parsers_copied(deliveries, models=True):
+    return [Utils.copy_object(object) for object in parsers(deliveries, models)]
+
+
+def flattener(deliveries, models=False):
+    rows = InningsFlattener(1, 1, PARTITION['match_type'], PARTITION['season']).parse(deliveries,
+                                                                                    InningsStateTracker(50))
+    if models:
+        return [(Delivery if type(row) is DeliveryRow else Wicket)(**row._asdict()) for row in rows]
+    return rows
+
+
+def flattener_rows(deliveries, dimension_ids):
+    rows = flattener(deliveries)
+    return DumpCricketDB.delivery_rows(rows, dimension_ids) + DumpCricketDB.wicket_rows(rows)
+
+
+def dimension_ids(all_innings):
+    """ Player and innings ids of the innings, upserted by the loader before the deliveries """
+    names = {name for deliveries in all_innings for row in flattener(deliveries) if type(row) is DeliveryRow
+             for name in (row.batsman, row.bowler, row.non_striker)}
+    return {Player: {name: id for id, name in enumerate(sorted(names), 1)}, Innings: {(1, 1): 1}}
+
+
+def main(file_names):
+    all_innings = list(scoresheet_innings(file_names)) if file_names else [synthetic_innings()]
+    ids = dimension_ids(all_innings)
+    balls = sum(len(ENSURE_LIST(deliveries)) for deliveries in all_innings)
+    for name, function, argument in (('parsers', parsers, False), ('flattener', flattener, False),
+                                   ('parsers + models', parsers, True), ('flattener + models', flattener, True),
+                                   ('parsers + models + copy', parsers_copied, True),
+                                   ('flattener + rows', flattener_rows, ids)):
+        timer = timeit.Timer(lambda: [function(deliveries, argument) for deliveries in all_innings])
+        number, _ = timer.autorange()
+        best = min(timer.repeat(repeat=5, number=number)) / number
+        print(f'{name:<24} {best / balls * 1e6:8.2f} us/ball')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
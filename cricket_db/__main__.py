@@ -0,0 +1,5 @@
+import sys
+
+from cricket_db.cli import main
+
+sys.exit(main())
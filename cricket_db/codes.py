@@ -0,0 +1,48 @@
+EXTRAS_TYPES = ('wides', 'noballs', 'byes', 'legbyes', 'penalty')
+
+DISMISSAL_KINDS = ('bowled', 'caught', 'caught and bowled', 'lbw', 'stumped', 'run out', 'hit wicket',
+                   'retired hurt', 'retired not out', 'retired out', 'obstructing the field',
+                   'handled the ball', 'hit the ball twice', 'timed out')
+
+PHASES = ('powerplay', 'middle', 'death')
+
+MATCH_TYPES = ('Test', 'ODI', 'T20', 'IT20', 'ODM', 'MDM')
+
+DISCIPLINES = ('batting', 'bowling')
+
+
+class UnknownCodeError(ValueError):
+    """ A name missing from the fixed list of a Codes """
+
+
+class Codes:
+    """
+    Small integer codes of a fixed list of names, stored in place of the repeated
+    strings. Codes start at 1 and follow the order of names, so new names must
+    only ever be appended.
+    """
+
+    def __init__(self, kind, names):
+        self.kind = kind
+        self.names = names
+        self.codes = {name: code for code, name in enumerate(names, 1)}
+
+    def encode(self, name):
+        if name is None:
+            return None
+        if name not in self.codes:
+            raise UnknownCodeError(f'Unknown {self.kind} {name!r}')
+        return self.codes[name]
+
+    def decode(self, code):
+        return self.names[code - 1] if code is not None else None
+
+    def rows(self):
+        return [{'id': code, 'name': name} for name, code in self.codes.items()]
+
+
+EXTRAS_TYPE_CODES = Codes('extras type', EXTRAS_TYPES)
+DISMISSAL_KIND_CODES = Codes('dismissal kind', DISMISSAL_KINDS)
+PHASE_CODES = Codes('phase', PHASES)
+MATCH_TYPE_CODES = Codes('match type', MATCH_TYPES)
+DISCIPLINE_CODES = Codes('discipline', DISCIPLINES)
@@ -0,0 +1,65 @@
+from sqlalchemy import Boolean, Integer, SmallInteger, Numeric, String
+
+
+class ColumnarBatch:
+    """
+    Accumulate rows of one model, dicts of column values, column by column and load them into
+    DuckDB with a single INSERT ... SELECT over an Arrow table instead of one insert per row.
+    Primary keys are drawn from the table sequence inside DuckDB.
+    """
+
+    def __init__(self, model):
+        self.table = model.__table__
+        self.primary_key = self.table.primary_key.columns.values()[0]
+        self.columns = [column for column in self.table.columns if column is not self.primary_key]
+        self.data = {column.name: [] for column in self.columns}
+
+    def __len__(self):
+        return len(self.data[self.columns[0].name])
+
+    def append(self, row):
+        for column in self.columns:
+            self.data[column.name].append(row[column.name])
+
+    def extend(self, rows):
+        for row in rows:
+            self.append(row)
+        return self
+
+    @staticmethod
+    def arrow_type(column):
+        import pyarrow
+        if isinstance(column.type, Boolean):
+            return pyarrow.bool_()
+        if isinstance(column.type, SmallInteger):
+            return pyarrow.int16()
+        if isinstance(column.type, Integer):
+            return pyarrow.int64()
+        if isinstance(column.type, Numeric):
+            return pyarrow.float64()
+        if isinstance(column.type, String):
+            return pyarrow.string()
+        raise TypeError(f'No arrow type for column {column.name} of type {column.type}')
+
+    def to_arrow(self):
+        import pyarrow
+        return pyarrow.table({
+            column.name: pyarrow.array(self.data[column.name]).cast(self.arrow_type(column))
+            for column in self.columns
+        })
+
+    def load(self, session):
+        """ Insert the batch through the DuckDB connection of the session """
+        if not len(self):
+            return
+        connection = session.connection().connection.driver_connection
+        view_name = f'{self.table.name}_batch'
+        column_names = ', '.join(column.name for column in self.columns)
+        connection.register(view_name, self.to_arrow())
+        try:
+            connection.execute(
+                f"INSERT INTO {self.table.name} ({self.primary_key.name}, {column_names}) "
+                f"SELECT nextval('{self.primary_key.default.name}'), {column_names} FROM {view_name}"
+            )
+        finally:
+            connection.unregister(view_name)
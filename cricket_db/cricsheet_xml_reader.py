@@ -1,51 +1,82 @@
 import os
+import re
 import xmltodict
 import yaml
 
 from cricket_db.models import Scoresheet, Match, Team, Competition
-from cricket_db.models import Player, Umpire, Innings, Delivery, Wicket
+from cricket_db.models import Player, Umpire, Innings
 from cricket_db.parsers.scoresheet_info import ScoresheetInfoParser
 from cricket_db.parsers.match import MatchParser
 from cricket_db.parsers.innings import InningsParser
-from cricket_db.parsers.delivery import DeliveryParser
-from cricket_db.parsers.wicket import WicketParser
+from cricket_db.parsers.flatten import InningsFlattener, to_model
+from cricket_db.innings_state import InningsStateTracker
 
 ENSURE_LIST = lambda x: [x] if not isinstance(x, list) else x
 
 
+class ScoresheetError(Exception):
+    """ A scoresheet that cannot be read or parsed """
+
+    def __init__(self, file_name, reason):
+        super().__init__(f'{file_name}: {reason}')
+        self.file_name = file_name
+        self.reason = reason
+
+
 class CricsheetXMLReader(object):
-    def __init__(self):
-        pass
+    def __init__(self, rows=False):
+        """ rows: deliveries and wickets as DeliveryRow and WicketRow tuples instead of model instances """
+        self.rows = rows
 
     @staticmethod
     def first_key_dict(temp_dict):
         return next(iter(temp_dict))
 
+    @staticmethod
+    def innings_ordinal(innings_key):
+        """ '1st innings' -> 1 """
+        return int(re.match(r'\d+', str(innings_key)).group())
+
+    @staticmethod
+    def season(start_date):
+        """ '2017-04-05' -> 2017 """
+        return int(str(start_date)[:4])
+
+    @staticmethod
+    def get_file_names(directory):
+        """ Scoresheet files of directory in name order, hidden files skipped """
+        return ['/'.join([directory, filename]) for filename in sorted(os.listdir(directory))
+                if not filename.startswith('.')]
+
     def get_lst_objects_from_directory(self, directory):
         objects = list()
-        for filename in os.listdir(directory):
-            file_name = '/'.join([directory, filename])
+        for file_name in self.get_file_names(directory):
             lst_of_objects = self.get_lst_objects_from_file(file_name)
             if lst_of_objects:
                 objects.extend(lst_of_objects)
         return objects
 
     def get_lst_objects_from_file(self, file_name):
-        if file_name.startswith('data/.'):
+        if os.path.basename(file_name).startswith('.'):
             return []
-        objects = list()
-        match_id = file_name.split('/')[-1].split('.')[0]
-        with open(file_name, 'r') as stream:
-            print(f'{file_name} is being processed')
-            raw_file = stream.read()
-            try:
-                raw = yaml.safe_load(raw_file)
-            except yaml.YAMLError as e:
-                print("Parsing YAML string failed")
-                print("Reason:", e.reason)
-                print("At position: {0} with encoding {1}".format(e.position, e.encoding))
-                print("Invalid char code:", e.character)
+        try:
+            with open(file_name, 'r', encoding='utf-8') as stream:
+                print(f'{file_name} is being processed')
+                raw_file = stream.read()
+        except (OSError, UnicodeDecodeError) as e:
+            raise ScoresheetError(file_name, f'Reading the file failed: {e}') from e
+        try:
+            raw = yaml.safe_load(raw_file)
+        except yaml.YAMLError as e:
+            raise ScoresheetError(file_name, f'Parsing YAML failed: {e}') from e
+        try:
+            match_id = int(os.path.basename(file_name).split('.')[0])
+            return self.get_lst_objects_from_raw(match_id, raw)
+        except (KeyError, IndexError, TypeError, ValueError, AttributeError) as e:
+            raise ScoresheetError(file_name, f'Invalid scoresheet: {type(e).__name__} {e}') from e
 
+    def get_lst_objects_from_raw(self, match_id, raw):
+        objects = list()
         match_parser = MatchParser(match_id)
         match_parse_result = match_parser.parse(raw['info'])
         objects.append(Match(**match_parse_result))
@@ -53,18 +84,36 @@ class CricsheetXMLReader(object):
         scoresheet_info_parser = ScoresheetInfoParser(match_id)
         objects.append(Scoresheet(**scoresheet_info_parser.parse(raw['meta'])))
 
+        partition = {
+            'match_type': match_parse_result['match_type'],
+            'season': CricsheetXMLReader.season(match_parse_result['start_date'])
+        }
+        totals = []
         for innings in ENSURE_LIST(raw['innings']):
-            innings_number = CricsheetXMLReader.first_key_dict(innings)
-            innings_parser = InningsParser(match_id, str(innings_number))
-            objects.append(Innings(**innings_parser.parse(innings[innings_number])))
-
-            for delivery in ENSURE_LIST(innings[innings_number]['deliveries']):
-                delivery_first_key = CricsheetXMLReader.first_key_dict(delivery)
-                over_number, ball_number = str(delivery_first_key).split('.')[0], str(delivery_first_key).split('.')[1]
-                delivery_parser = DeliveryParser(match_id, innings_number, over_number, ball_number)
-                objects.append(Delivery(**delivery_parser.parse(delivery[delivery_first_key])))
-                if 'wicket' in delivery[delivery_first_key]:
-                    for wicket in ENSURE_LIST(delivery[delivery_first_key]['wicket']):
-                        wicket_parser = WicketParser(match_id, innings_number, over_number, ball_number)
-                        objects.append(Wicket(**wicket_parser.parse(wicket)))
+            innings_key = CricsheetXMLReader.first_key_dict(innings)
+            innings_number = CricsheetXMLReader.innings_ordinal(innings_key)
+            innings_parser = InningsParser(match_id, innings_number)
+            objects.append(Innings(**innings_parser.parse(innings[innings_key])))
+            team = innings[innings_key]['team']
+            innings_state = InningsStateTracker(match_parse_result['max_overs'],
+                                                CricsheetXMLReader.target(match_parse_result['max_overs'], team,
+                                                                          totals))
+            flattener = InningsFlattener(match_id, innings_number, partition['match_type'], partition['season'])
+            rows = flattener.parse(innings[innings_key]['deliveries'], innings_state)
+            objects.extend(rows if self.rows else map(to_model, rows))
+            totals.append((team, innings_state.runs))
         return objects
+
+    @staticmethod
+    def target(max_overs, team, totals):
+        """
+        Runs team needs to win when batting after the innings of totals, (team, runs) pairs:
+        the second innings of a limited overs match and the fourth of a multi day match,
+        follow on included, chase a target. None for every other innings.
+        """
+        if max_overs:
+            return totals[0][1] + 1 if len(totals) == 1 else None
+        if len(totals) != 3:
+            return None
+        return sum(runs for other, runs in totals if other != team) - \
+            sum(runs for other, runs in totals if other == team) + 1
@@ -0,0 +1,444 @@
+import abc
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from sqlalchemy import func, or_
+from sqlalchemy.exc import DataError, IntegrityError
+from sqlalchemy.orm import sessionmaker
+from cricket_db.models import Base, Match, Competition, Team, Player, Umpire, Delivery, Innings, Wicket, City, Venue, \
+    IngestCheckpoint
+from cricket_db.cricsheet_xml_reader import CricsheetXMLReader, ScoresheetError
+from cricket_db.utils import Utils
+from cricket_db.columnar import ColumnarBatch
+from cricket_db.venues import VenueAliases
+from cricket_db.codes import EXTRAS_TYPE_CODES, DISMISSAL_KIND_CODES, PHASE_CODES, MATCH_TYPE_CODES, \
+    UnknownCodeError
+from cricket_db.partitioning import PostgresPartitions
+from cricket_db.head_to_head import HeadToHead
+from cricket_db.form import PlayerForm, DEFAULT_WINDOWS
+from cricket_db.partnerships import Partnerships
+from cricket_db.parsers.flatten import DeliveryRow, WicketRow, DELIVERY_TYPES, WICKET_TYPES, to_dict
+
+
+DIMENSION_COLUMNS = {
+    Match: ((Competition, 'competition'), (City, 'city'), (Team, 'team_home'), (Team, 'team_away'), (Team, 'winner'),
+            (Player, 'player_of_match'), (Team, 'toss_won_by'), (Umpire, 'umpire_first'),
+            (Umpire, 'umpire_second'), (Umpire, 'umpire_third'), (Umpire, 'umpire_forth')),
+    Innings: ((Team, 'batting_team'),),
+    Delivery: ((Player, 'batsman'), (Player, 'bowler'), (Player, 'non_striker')),
+    Wicket: ((Player, 'player_out_name'), (Player, 'fielder_name')),
+}
+DIMENSION_COLUMNS[DeliveryRow] = DIMENSION_COLUMNS[Delivery]
+DIMENSION_COLUMNS[WicketRow] = DIMENSION_COLUMNS[Wicket]
+
+LOADED = 'loaded'
+QUARANTINED = 'quarantined'
+# failures caused by the content of a scoresheet, a batch failing otherwise, e.g. on a
+# dropped connection or a lock timeout, is raised instead of quarantining its files
+DATA_ERRORS = (ScoresheetError, UnknownCodeError, IntegrityError, DataError)
+
+
+def resolve(dimension_ids, model, name):
+    """
+    Id of a dimension row upserted for the batch. Rows are never created here, a
+    commit in the middle of the batch transaction would keep half a failed batch.
+    """
+    if name is None:
+        return None
+    ids = dimension_ids.get(model, {})
+    if name not in ids:
+        raise KeyError(f'{model.__tablename__} {name!r} was not upserted with the batch')
+    return ids[name]
+
+
+def read_scoresheet(file_name):
+    """ (file name, objects, None) or (file name, None, reason) when the scoresheet cannot be read """
+    try:
+        return file_name, CricsheetXMLReader(rows=True).get_lst_objects_from_file(file_name), None
+    except ScoresheetError as e:
+        return file_name, None, e.reason
+
+
+class DumpCricketDB:
+    def __init__(self, engine, partitioned=False, quarantine_dir=None, name_index=None, form_windows=DEFAULT_WINDOWS):
+        Session = sessionmaker(bind=engine)
+        self.session = Session()
+        self.columnar = engine.dialect.name == 'duckdb'
+        self.dimension_ids = {}
+        self.partitions = PostgresPartitions(engine) if partitioned else None
+        self.quarantine_dir = quarantine_dir
+        self.quarantine = []
+        self.skipped = []
+        self.name_index = name_index
+        self.player_form = PlayerForm(form_windows)
+        self.batch_number = None
+        if self.partitions:
+            self.partitions.create_tables()
+        Base.metadata.create_all(engine)
+
+    def dump_data_from_directory(self, dir_path='data', batch_size=100, workers=1, incremental=False,
+                                 progress=None, resume=False):
+        """
+        Load the scoresheets of dir_path in batches of batch_size. With several workers the
+        scoresheets are parsed in worker processes, the next batch while the current one is
+        written. incremental skips the matches already loaded, resume the files journaled as
+        loaded or quarantined by an earlier run, without reading them. progress is called
+        after every batch with the number of files done, the number of files and the batch.
+        """
+        file_names = CricsheetXMLReader.get_file_names(dir_path)
+        if resume:
+            file_names = self.unjournaled_file_names(file_names)
+        if incremental:
+            file_names = self.unloaded_file_names(file_names)
+        done = 0
+        self.batch_number = self.session.query(func.max(IngestCheckpoint.batch)).scalar() or 0
+        for results in self.read_batches(file_names, batch_size, workers):
+            batch = self.dump_results(results)
+            done += len(results)
+            if progress:
+                progress(done, len(file_names), batch)
+
+    def dump_data_from_file(self, file_name):
+        """ Load one scoresheet as a batch of its own """
+        self.batch_number = self.session.query(func.max(IngestCheckpoint.batch)).scalar() or 0
+        self.dump_results([read_scoresheet(file_name)])
+
+    def dump_results(self, results):
+        """
+        Load the next batch from read_scoresheet results, the scoresheets that could not be read
+        are quarantined and those of matches already loaded skipped. Returns the (file name,
+        objects) pairs read.
+        """
+        self.batch_number += 1
+        batch = []
+        for file_name, objects, reason in results:
+            if reason is None:
+                batch.append((file_name, objects))
+            else:
+                self.quarantine_file(file_name, reason)
+        loaded = self.loaded_matches(batch)
+        for file_name, match_id in loaded.items():
+            self.skip_file(file_name, match_id)
+        self.dump_batch([(file_name, objects) for file_name, objects in batch if file_name not in loaded])
+        return batch
+
+    def unjournaled_file_names(self, file_names):
+        """ The file names the checkpoint journal has no entry for """
+        journaled = {file_name for file_name, in self.session.query(IngestCheckpoint.file_name)}
+        return [file_name for file_name in file_names if os.path.basename(file_name) not in journaled]
+
+    def unloaded_file_names(self, file_names):
+        """ The file names whose match, named by the file, is not loaded yet """
+        loaded = {str(match_id) for match_id, in self.session.query(Match.id)}
+        return [file_name for file_name in file_names if os.path.basename(file_name).split('.')[0] not in loaded]
+
+    def loaded_matches(self, batch):
+        """ {file name: match id} of the scoresheets of batch whose match is already loaded """
+        match_ids = {file_name: object.id for file_name, objects in batch for object in objects
+                     if isinstance(object, Match)}
+        if not match_ids:
+            return {}
+        loaded = {match_id for match_id, in self.session.query(Match.id).filter(Match.id.in_(set(match_ids.values())))}
+        return {file_name: match_id for file_name, match_id in match_ids.items() if match_id in loaded}
+
+    @staticmethod
+    def read_batches(file_names, batch_size, workers=1):
+        """ Lists of read_scoresheet results, batch_size files each """
+        chunks = [file_names[start:start + batch_size] for start in range(0, len(file_names), batch_size)]
+        if workers <= 1:
+            for chunk in chunks:
+                yield [read_scoresheet(file_name) for file_name in chunk]
+            return
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            pending = None
+            for chunk in chunks:
+                futures = [executor.submit(read_scoresheet, file_name) for file_name in chunk]
+                if pending:
+                    yield [future.result() for future in pending]
+                pending = futures
+            if pending:
+                yield [future.result() for future in pending]
+
+    def dump_batch(self, batch):
+        """
+        Load batch, a list of (file name, objects) pairs, in one transaction. When it fails
+        on the data of a scoresheet the batch is bisected until the failing scoresheets are
+        isolated and quarantined, the other halves are still loaded in bulk. A scoresheet
+        failing on its match loaded meanwhile by another writer is skipped. The files are
+        journaled as loaded in the same transaction, so a journaled file is never loaded twice.
+        """
+        if not batch:
+            return
+        lst_objects = [object for file_name, objects in batch for object in objects]
+        try:
+            self.dump_dimensions(lst_objects)
+            self.dump_partitions(lst_objects)
+            self.dump_match(lst_objects)
+            self.dump_innings(lst_objects)
+            self.dump_deliveries(lst_objects)
+            self.dump_wickets(lst_objects)
+            self.dump_head_to_head(lst_objects)
+            self.dump_player_form(lst_objects)
+            self.dump_partnerships(lst_objects)
+            self.dump_checkpoints([file_name for file_name, objects in batch], LOADED)
+            self.session.commit()
+        except DATA_ERRORS as e:
+            self.session.rollback()
+            if len(batch) == 1:
+                loaded = self.loaded_matches(batch) if isinstance(e, IntegrityError) else {}
+                if loaded:
+                    self.skip_file(batch[0][0], loaded[batch[0][0]])
+                else:
+                    self.quarantine_file(batch[0][0], e)
+                return
+            middle = len(batch) // 2
+            self.dump_batch(batch[:middle])
+            self.dump_batch(batch[middle:])
+
+    def skip_file(self, file_name, match_id):
+        print(f'{file_name} is skipped: match {match_id} is already loaded')
+        self.skipped.append(file_name)
+
+    def quarantine_file(self, file_name, reason):
+        """ Record a scoresheet that could not be loaded, moving it to quarantine_dir when set """
+        print(f'{file_name} is quarantined: {reason}')
+        if self.quarantine_dir:
+            os.makedirs(self.quarantine_dir, exist_ok=True)
+            shutil.move(file_name, os.path.join(self.quarantine_dir, os.path.basename(file_name)))
+        self.quarantine.append((file_name, str(reason)))
+        self.dump_checkpoints([file_name], QUARANTINED, str(reason))
+        self.session.commit()
+
+    def dump_checkpoints(self, file_names, status, reason=None):
+        """
+        Journal the files of the current batch, replacing entries of earlier runs. A loaded entry
+        is never replaced by a quarantined one, its match stays loaded whatever its file became.
+        """
+        statement = Utils.insert(self.session, IngestCheckpoint)
+        statement = statement.on_conflict_do_update(
+            index_elements=['file_name'],
+            set_={column: statement.excluded[column] for column in ('batch', 'status', 'reason')},
+            where=or_(statement.excluded.status == LOADED, IngestCheckpoint.status != LOADED))
+        self.session.execute(statement, [{'file_name': os.path.basename(file_name), 'batch': self.batch_number,
+                                          'status': status, 'reason': reason} for file_name in file_names])
+
+    def reload_partition(self, match_type, season, dir_path='data'):
+        """ Replace the deliveries and wickets of one match type and season by those of their scoresheets """
+        if not self.partitions:
+            raise ValueError('Reloading a partition needs the partitioned layout')
+        match_ids = [match_id for match_id, in self.session.query(Match.id).
+                     filter(Match.match_type == match_type, Match.start_date.like(f'{season}-%'))]
+        file_names = [f'{dir_path}/{match_id}.yaml' for match_id in match_ids]
+        # checked before the partition is emptied, the matches of a missing scoresheet would be lost
+        missing = [file_name for file_name in file_names if not os.path.isfile(file_name)]
+        if missing:
+            raise FileNotFoundError(f'Reloading {match_type} {season} needs the scoresheets of every loaded match, '
+                                    f'missing: {", ".join(missing)}')
+        reader = CricsheetXMLReader(rows=True)
+        lst_objects = [object for file_name in file_names for object in reader.get_lst_objects_from_file(file_name)
+                       if isinstance(object, DELIVERY_TYPES + WICKET_TYPES)]
+        self.dump_dimensions(lst_objects)
+        head_to_head = HeadToHead.from_objects(lst_objects, self.dimension_ids.get(Player, {}))
+        head_to_head.subtract(HeadToHead.from_deliveries(
+            self.session, Delivery.match_type == MATCH_TYPE_CODES.encode(match_type), Delivery.season == season))
+        self.partitions.truncate_partition(self.session, MATCH_TYPE_CODES.encode(match_type), season)
+        self.load_innings_ids(match_ids)
+        self.dump_deliveries(lst_objects)
+        self.dump_wickets(lst_objects)
+        head_to_head.upsert(self.session)
+        self.dump_player_form(lst_objects)
+        Partnerships.delete(self.session, match_ids)
+        self.dump_partnerships(lst_objects)
+        self.session.commit()
+
+    def dump_dimensions(self, lst_objects):
+        """
+        Upsert every dimension name (teams, players, umpires, competitions, cities, venues) of
+        lst_objects. Committed on its own so the ids stay valid if the rest of the batch fails.
+        """
+        names = {}
+        for object in lst_objects:
+            for model, column in DIMENSION_COLUMNS.get(type(object), ()):
+                names.setdefault(model, set()).add(getattr(object, column))
+        dimension_ids = {model: Utils.bulk_get_or_create(self.session, model, model_names)
+                         for model, model_names in names.items()}
+        venues = [(object.venue, object.city) for object in lst_objects if isinstance(object, Match)]
+        dimension_ids[Venue] = VenueAliases.bulk_get_or_create(self.session, venues)
+        self.session.commit()
+        for model, ids in dimension_ids.items():
+            self.dimension_ids.setdefault(model, {}).update(ids)
+            if self.name_index is not None and model in (Player, Team, Umpire):
+                self.name_index.add_ids(model.__tablename__, ids)
+
+    def dump_partitions(self, lst_objects):
+        """ Create the partitions the deliveries and wickets of lst_objects are routed to """
+        if not self.partitions:
+            return
+        keys = {(MATCH_TYPE_CODES.encode(object.match_type), object.season)
+                for object in lst_objects if isinstance(object, DELIVERY_TYPES + WICKET_TYPES)}
+        self.partitions.ensure_partitions(self.session, keys)
+        self.session.commit()
+
+    def dump_match(self, lst_objects):
+        lst_modified_objects = []
+        for object in lst_objects:
+            if isinstance(object, Match):
+                match = MatchPreprocessObjects(Utils.copy_object(object), self.session, self.dimension_ids)
+                match.process()
+                lst_modified_objects.append(match.obj)
+        self.session.bulk_save_objects(lst_modified_objects)
+        # the innings of the batch resolve their match against the matches it inserts
+        self.dimension_ids.setdefault(Match, {}).update((match.id, match.id) for match in lst_modified_objects)
+
+    def dump_innings(self, lst_objects):
+        lst_modified_objects = []
+        for object in lst_objects:
+            if isinstance(object, Innings):
+                innings = InningsPreprocessObjects(Utils.copy_object(object), self.session, self.dimension_ids)
+                innings.process()
+                lst_modified_objects.append(innings.obj)
+        self.session.bulk_save_objects(lst_modified_objects)
+        self.load_innings_ids({innings.match for innings in lst_modified_objects})
+
+    def load_innings_ids(self, match_ids):
+        """ Cache the ids of the innings of match_ids by (match, innings number) for the deliveries """
+        innings_ids = self.dimension_ids.setdefault(Innings, {})
+        for match, innings_number, innings_id in self.session.query(Innings.match, Innings.innings_number, Innings.id). \
+                filter(Innings.match.in_(match_ids)):
+            innings_ids[(match, innings_number)] = innings_id
+
+    def dump_deliveries(self, lst_objects):
+        rows = self.delivery_rows(lst_objects, self.dimension_ids)
+        if self.columnar:
+            ColumnarBatch(Delivery).extend(rows).load(self.session)
+        elif rows:
+            self.session.execute(Delivery.__table__.insert(), rows)
+
+    def dump_wickets(self, lst_objects):
+        rows = self.wicket_rows(lst_objects)
+        if rows:
+            self.session.execute(Wicket.__table__.insert(), rows)
+
+    @staticmethod
+    def delivery_rows(lst_objects, dimension_ids):
+        """ Insert parameters of the deliveries of lst_objects, names resolved to ids and labels encoded """
+        rows = []
+        for object in lst_objects:
+            if isinstance(object, DELIVERY_TYPES):
+                row = to_dict(object)
+                row['batsman'] = resolve(dimension_ids, Player, row['batsman'])
+                row['bowler'] = resolve(dimension_ids, Player, row['bowler'])
+                row['non_striker'] = resolve(dimension_ids, Player, row['non_striker'])
+                row['innings'] = resolve(dimension_ids, Innings, (row['match'], row['innings']))
+                row['match_type'] = MATCH_TYPE_CODES.encode(row['match_type'])
+                row['extras_type'] = EXTRAS_TYPE_CODES.encode(row['extras_type'])
+                row['phase'] = PHASE_CODES.encode(row['phase'])
+                rows.append(row)
+        return rows
+
+    @staticmethod
+    def wicket_rows(lst_objects):
+        """ Insert parameters of the wickets of lst_objects, labels encoded, players are kept by name """
+        rows = []
+        for object in lst_objects:
+            if isinstance(object, WICKET_TYPES):
+                row = to_dict(object)
+                row['match_type'] = MATCH_TYPE_CODES.encode(row['match_type'])
+                row['kind'] = DISMISSAL_KIND_CODES.encode(row['kind'])
+                rows.append(row)
+        return rows
+
+    def dump_head_to_head(self, lst_objects):
+        """ Add the batsman versus bowler totals of the loaded deliveries to the head_to_head table """
+        HeadToHead.from_objects(lst_objects, self.dimension_ids.get(Player, {})).upsert(self.session)
+
+    def dump_player_form(self, lst_objects):
+        """ Merge the loaded innings into the player form series """
+        self.player_form.update(self.session, lst_objects, self.dimension_ids.get(Player, {}))
+
+    def dump_partnerships(self, lst_objects):
+        Partnerships.insert(self.session, Partnerships.from_objects(lst_objects, self.dimension_ids.get(Player, {})))
+
+
+class AbstractPreprocessObjects:
+
+    def __init__(self, obj, session, dimension_ids=None):
+        self.obj = obj
+        self.session = session
+        self.dimension_ids = dimension_ids or {}
+
+    @abc.abstractmethod
+    def process(self):
+        """ process the object """
+
+        return
+
+    def resolve(self, model, name):
+        return resolve(self.dimension_ids, model, name)
+
+
+class MatchPreprocessObjects(AbstractPreprocessObjects):
+
+    def process(self):
+        self.process_competition()
+        self.process_venue()
+        self.process_city()
+        self.process_team_home()
+        self.process_team_away()
+        self.process_winner()
+        self.process_player_of_match()
+        self.process_toss_won_by()
+        self.process_umpire_first()
+        self.process_umpire_second()
+        self.process_umpire_third()
+        self.process_umpire_forth()
+
+    def process_competition(self):
+        self.obj.competition = self.resolve(Competition, self.obj.competition)
+
+    def process_venue(self):
+        self.obj.venue = self.resolve(Venue, self.obj.venue)
+
+    def process_city(self):
+        self.obj.city = self.resolve(City, self.obj.city)
+
+    def process_team_home(self):
+        self.obj.team_home = self.resolve(Team, self.obj.team_home)
+
+    def process_team_away(self):
+        self.obj.team_away = self.resolve(Team, self.obj.team_away)
+
+    def process_winner(self):
+        self.obj.winner = self.resolve(Team, self.obj.winner)
+
+    def process_player_of_match(self):
+        self.obj.player_of_match = self.resolve(Player, self.obj.player_of_match)
+
+    def process_toss_won_by(self):
+        self.obj.toss_won_by = self.resolve(Team, self.obj.toss_won_by)
+
+    def process_umpire_first(self):
+        self.obj.umpire_first = self.resolve(Umpire, self.obj.umpire_first)
+
+    def process_umpire_second(self):
+        self.obj.umpire_second = self.resolve(Umpire, self.obj.umpire_second)
+
+    def process_umpire_third(self):
+        self.obj.umpire_third = self.resolve(Umpire, self.obj.umpire_third)
+
+    def process_umpire_forth(self):
+        self.obj.umpire_forth = self.resolve(Umpire, self.obj.umpire_forth)
+
+
+class InningsPreprocessObjects(AbstractPreprocessObjects):
+
+    def process(self):
+        self.process_batting_team()
+        self.process_match()
+
+    def process_batting_team(self):
+        self.obj.batting_team = self.resolve(Team, self.obj.batting_team)
+
+    def process_match(self):
+        self.obj.match = self.resolve(Match, self.obj.match)
+
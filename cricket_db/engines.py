@@ -0,0 +1,41 @@
+import abc
+from sqlalchemy import create_engine
+
+
+class Engine:
+    def __init__(self, host="", database_name="cricsheet", user="", password=""):
+        self.database_name = database_name
+        self.host = host
+        self.user = user
+        self.password = password
+
+    @abc.abstractmethod
+    def create_engine(self, input):
+        """Create engine and return engine"""
+        return
+
+
+class SQlLiteEngine(Engine):
+
+    def create_engine(self):
+        """Create engine and return engine"""
+        return create_engine('sqlite:///' + self.database_name, echo=True)
+
+
+class PostgresEngine(Engine):
+
+    def create_engine(self):
+        """Create engine and return engine"""
+        connection_string = f'postgresql+psycopg2://{self.user}:{self.password}@{self.host}/{self.database_name}'
+        return create_engine(connection_string)
+
+
+class DuckDBEngine(Engine):
+    def __init__(self, database_name="cricsheet.duckdb", threads=None):
+        super().__init__(database_name=database_name)
+        self.threads = threads
+
+    def create_engine(self):
+        """Create engine and return engine"""
+        config = {'threads': self.threads} if self.threads else {}
+        return create_engine('duckdb:///' + self.database_name, connect_args={'config': config})
@@ -0,0 +1,195 @@
+import itertools
+from collections import defaultdict
+
+from sqlalchemy import and_, bindparam, text
+
+from cricket_db.models import Match, PlayerInnings, PlayerFormRecord
+from cricket_db.codes import MATCH_TYPE_CODES, DISCIPLINE_CODES
+from cricket_db.head_to_head import BOWLER_DISMISSALS
+from cricket_db.innings_state import ILLEGAL_EXTRAS, NOT_OUT_DISMISSALS
+from cricket_db.parsers.flatten import DELIVERY_TYPES, WICKET_TYPES
+
+DEFAULT_WINDOWS = (5, 10, 20)
+BATTING = DISCIPLINE_CODES.encode('batting')
+BOWLING = DISCIPLINE_CODES.encode('bowling')
+# arbitrary first key of the advisory locks serialising the updates of a player between writers
+FORM_LOCK = 0x666f726d
+INNINGS_COLUMNS = ('match', 'innings_number', 'start_date', 'runs', 'balls', 'dismissed',
+                   'wickets', 'runs_conceded', 'balls_bowled')
+SUMMED_COLUMNS = ('runs', 'balls', 'dismissed', 'wickets', 'runs_conceded', 'balls_bowled')
+
+
+class PlayerForm:
+    """
+    Innings by innings time series of every player per match type and discipline, ordered
+    by match date, with rolling totals, batting average, strike rate and economy over the
+    last windows innings. Innings batted and innings bowled are separate series, so batting
+    windows only count innings batted and bowling windows innings bowled. A loaded batch
+    only rewrites the series of its players from the first innings that changed, usually
+    just the appended innings. On Postgres writers loading the same players in parallel
+    are serialised per player, each reads the series as the other committed it.
+    """
+
+    def __init__(self, windows=DEFAULT_WINDOWS):
+        self.windows = tuple(sorted(set(windows)))
+
+    @staticmethod
+    def innings_key(row):
+        return row['start_date'], row['match'], row['innings_number']
+
+    @staticmethod
+    def match_dates(session, lst_objects):
+        dates = {object.id: str(object.start_date) for object in lst_objects if isinstance(object, Match)}
+        match_ids = {object.match for object in lst_objects if isinstance(object, DELIVERY_TYPES)} - set(dates)
+        if match_ids:
+            dates.update(session.query(Match.id, Match.start_date).filter(Match.id.in_(match_ids)))
+        return dates
+
+    @staticmethod
+    def innings_rows(lst_objects, player_ids, match_dates):
+        """
+        {(player, match type code, discipline code): {(match, innings number): innings row}} of
+        deliveries and wickets as read
+        """
+        groups = defaultdict(dict)
+
+        def row(name, object, discipline, match, innings_number):
+            rows = groups[(player_ids[name], MATCH_TYPE_CODES.encode(object.match_type), discipline)]
+            if (match, innings_number) not in rows:
+                rows[(match, innings_number)] = {
+                    'match': match, 'innings_number': innings_number, 'start_date': match_dates[match],
+                    'runs': 0, 'balls': 0, 'dismissed': False, 'wickets': 0, 'runs_conceded': 0, 'balls_bowled': 0}
+            return rows[(match, innings_number)]
+
+        bowlers = {}
+        for object in lst_objects:
+            if isinstance(object, DELIVERY_TYPES):
+                bowlers[(object.match, object.innings, object.over_number, object.ball_number)] = object.bowler
+                batting = row(object.batsman, object, BATTING, object.match, object.innings)
+                batting['runs'] += object.runs_batsman
+                batting['balls'] += int(object.extras_type != 'wides')
+                row(object.non_striker, object, BATTING, object.match, object.innings)
+                bowling = row(object.bowler, object, BOWLING, object.match, object.innings)
+                bowling['runs_conceded'] += object.runs_batsman
+                if object.extras_type in ILLEGAL_EXTRAS:
+                    bowling['runs_conceded'] += object.runs_extras
+                else:
+                    bowling['balls_bowled'] += 1
+        for object in lst_objects:
+            if isinstance(object, WICKET_TYPES):
+                if object.kind not in NOT_OUT_DISMISSALS:
+                    row(object.player_out_name, object, BATTING, object.match_id,
+                        object.innings_number)['dismissed'] = True
+                bowler = bowlers.get((object.match_id, object.innings_number, object.over_number, object.ball_number))
+                if object.kind in BOWLER_DISMISSALS and bowler is not None:
+                    row(bowler, object, BOWLING, object.match_id, object.innings_number)['wickets'] += 1
+        return groups
+
+    def form_rows(self, player, match_type, discipline, rows, first=0):
+        """ Rolling rows of every window for the innings rows from position first on """
+        cumulative = [(0,) * len(SUMMED_COLUMNS)]
+        for row in rows:
+            cumulative.append(tuple(total + int(row[column])
+                                    for total, column in zip(cumulative[-1], SUMMED_COLUMNS)))
+        form_rows = []
+        for window in self.windows:
+            for position in range(first, len(rows)):
+                start = max(0, position + 1 - window)
+                runs, balls, dismissals, wickets, runs_conceded, balls_bowled = (
+                    end - begin for end, begin in zip(cumulative[position + 1], cumulative[start]))
+                form_rows.append({
+                    'player': player, 'match_type': match_type, 'discipline': discipline, 'window_size': window,
+                    'sequence': position + 1, 'match': rows[position]['match'],
+                    'start_date': rows[position]['start_date'], 'innings': position + 1 - start,
+                    'runs': runs, 'balls': balls, 'dismissals': dismissals, 'wickets': wickets,
+                    'runs_conceded': runs_conceded, 'balls_bowled': balls_bowled,
+                    'batting_average': round(runs / dismissals, 2) if dismissals else None,
+                    'strike_rate': round(runs * 100 / balls, 2) if balls else None,
+                    'economy': round(runs_conceded * 6 / balls_bowled, 2) if balls_bowled else None,
+                })
+        return form_rows
+
+    def update(self, session, lst_objects, player_ids):
+        """
+        Merge the innings of lst_objects into the series of their players, replacing innings
+        loaded before, and rewrite the innings and rolling rows from the first change on.
+        """
+        groups = self.innings_rows(lst_objects, player_ids, self.match_dates(session, lst_objects))
+        if not groups:
+            return
+        players = {player for player, match_type, discipline in groups}
+        self.lock_players(session, players)
+        existing = defaultdict(list)
+        for record in session.query(PlayerInnings). \
+                filter(PlayerInnings.player.in_(players),
+                       PlayerInnings.match_type.in_({match_type for player, match_type, discipline in groups})). \
+                order_by(PlayerInnings.sequence):
+            key = (record.player, record.match_type, record.discipline)
+            if key in groups:
+                existing[key].append({column: getattr(record, column) for column in INNINGS_COLUMNS})
+        deletes, innings_rows, form_rows = [], [], []
+        for (player, match_type, discipline), new_rows in groups.items():
+            old_rows = existing[(player, match_type, discipline)]
+            merged = {(row['match'], row['innings_number']): row for row in old_rows}
+            merged.update(new_rows)
+            rows = sorted(merged.values(), key=self.innings_key)
+            first = next((position for position, (row, old_row) in enumerate(zip(rows, old_rows))
+                          if row != old_row), min(len(rows), len(old_rows)))
+            if first == len(rows) == len(old_rows):
+                continue
+            deletes.append({'b_player': player, 'b_match_type': match_type, 'b_discipline': discipline,
+                            'b_sequence': first + 1})
+            innings_rows.extend(dict(row, player=player, match_type=match_type, discipline=discipline,
+                                     sequence=position + 1)
+                                for position, row in enumerate(rows) if position >= first)
+            form_rows.extend(self.form_rows(player, match_type, discipline, rows, first))
+        if deletes:
+            for model in (PlayerFormRecord, PlayerInnings):
+                table = model.__table__
+                session.execute(table.delete().where(and_(table.c.player == bindparam('b_player'),
+                                                          table.c.match_type == bindparam('b_match_type'),
+                                                          table.c.discipline == bindparam('b_discipline'),
+                                                          table.c.sequence >= bindparam('b_sequence'))), deletes)
+            session.execute(PlayerInnings.__table__.insert(), innings_rows)
+            session.execute(PlayerFormRecord.__table__.insert(), form_rows)
+
+    @staticmethod
+    def lock_players(session, players):
+        """ Lock players until the end of the transaction, in id order so writers cannot deadlock """
+        if session.get_bind().dialect.name != 'postgresql':
+            return
+        session.execute(text('SELECT pg_advisory_xact_lock(:key, player) '
+                             'FROM unnest(CAST(:players AS integer[])) AS player'),
+                        {'key': FORM_LOCK, 'players': sorted(players)})
+
+    def rebuild(self, session):
+        """ Recompute the player_form table from player_innings, e.g. after changing the windows """
+        session.query(PlayerFormRecord).delete()
+        records = session.query(PlayerInnings). \
+            order_by(PlayerInnings.player, PlayerInnings.match_type, PlayerInnings.discipline, PlayerInnings.sequence)
+        for (player, match_type, discipline), group in itertools.groupby(
+                records, lambda record: (record.player, record.match_type, record.discipline)):
+            rows = [{column: getattr(record, column) for column in INNINGS_COLUMNS} for record in group]
+            session.execute(PlayerFormRecord.__table__.insert(), self.form_rows(player, match_type, discipline, rows))
+
+    @staticmethod
+    def series(session, player, match_type, window, start_date=None, end_date=None, discipline='batting'):
+        """ Rolling rows of a player in one match type, discipline, window and optional date range, oldest first """
+        query = session.query(PlayerFormRecord). \
+            filter(PlayerFormRecord.player == player, PlayerFormRecord.match_type == match_type,
+                   PlayerFormRecord.discipline == DISCIPLINE_CODES.encode(discipline),
+                   PlayerFormRecord.window_size == window)
+        if start_date is not None:
+            query = query.filter(PlayerFormRecord.start_date >= str(start_date))
+        if end_date is not None:
+            query = query.filter(PlayerFormRecord.start_date <= str(end_date))
+        return query.order_by(PlayerFormRecord.sequence).all()
+
+    @staticmethod
+    def latest(session, player, match_type, window, discipline='batting'):
+        """ Current form of a player in a discipline, the rolling row of the last innings batted or bowled """
+        return session.query(PlayerFormRecord). \
+            filter(PlayerFormRecord.player == player, PlayerFormRecord.match_type == match_type,
+                   PlayerFormRecord.discipline == DISCIPLINE_CODES.encode(discipline),
+                   PlayerFormRecord.window_size == window). \
+            order_by(PlayerFormRecord.sequence.desc()).first()
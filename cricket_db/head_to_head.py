@@ -0,0 +1,142 @@
+import heapq
+from collections import defaultdict, namedtuple
+
+from sqlalchemy import and_, case, func
+
+from cricket_db.models import Delivery, Innings, Player, Wicket, HeadToHeadRecord
+from cricket_db.codes import EXTRAS_TYPE_CODES, DISMISSAL_KIND_CODES, MATCH_TYPE_CODES
+from cricket_db.utils import Utils
+from cricket_db.parsers.flatten import DELIVERY_TYPES, WICKET_TYPES
+
+# dismissals credited to the bowler
+BOWLER_DISMISSALS = ('bowled', 'caught', 'caught and bowled', 'lbw', 'stumped', 'hit wicket')
+
+Matchup = namedtuple('Matchup', ['batsman', 'bowler', 'match_type', 'runs', 'balls', 'dismissals'])
+
+
+class HeadToHead:
+    """
+    Sparse batsman versus bowler matrix of runs scored, balls faced and dismissals,
+    per match type and over all match types (match_type None). Pairs are looked up in
+    O(1) and each player keeps the set of opponents faced for top matchup queries.
+    Wides do not count as balls faced and only dismissals credited to the bowler count.
+    """
+
+    def __init__(self):
+        self.records = {}
+        self.bowlers_faced = defaultdict(set)
+        self.batsmen_bowled_to = defaultdict(set)
+
+    def __len__(self):
+        return sum(1 for batsman, bowler, match_type in self.records if match_type is not None)
+
+    def add(self, batsman, bowler, match_type, runs, balls, dismissals):
+        for key in ((batsman, bowler, match_type), (batsman, bowler, None)):
+            record = self.records.setdefault(key, [0, 0, 0])
+            record[0] += runs
+            record[1] += balls
+            record[2] += dismissals
+        self.bowlers_faced[batsman].add(bowler)
+        self.batsmen_bowled_to[bowler].add(batsman)
+
+    def get(self, batsman, bowler, match_type=None):
+        runs, balls, dismissals = self.records.get((batsman, bowler, match_type), (0, 0, 0))
+        return Matchup(batsman, bowler, match_type, runs, balls, dismissals)
+
+    def top_matchups(self, player, as_batsman=True, match_type=None, order_by='runs', limit=10):
+        """ The limit matchups of player with the highest order_by (runs, balls or dismissals) """
+        if as_batsman:
+            matchups = (self.get(player, bowler, match_type) for bowler in self.bowlers_faced.get(player, ()))
+        else:
+            matchups = (self.get(batsman, player, match_type) for batsman in self.batsmen_bowled_to.get(player, ()))
+        return heapq.nlargest(limit, (matchup for matchup in matchups if matchup.balls or matchup.runs),
+                              key=lambda matchup: getattr(matchup, order_by))
+
+    def rows(self):
+        return [{'batsman': batsman, 'bowler': bowler, 'match_type': match_type,
+                 'runs': runs, 'balls': balls, 'dismissals': dismissals}
+                for (batsman, bowler, match_type), (runs, balls, dismissals) in self.records.items()
+                if match_type is not None]
+
+    @classmethod
+    def from_objects(cls, lst_objects, player_ids):
+        """ Matrix of the deliveries and wickets of scoresheets as read, player_ids maps names to ids """
+        dismissed = defaultdict(set)
+        for object in lst_objects:
+            if isinstance(object, WICKET_TYPES) and object.kind in BOWLER_DISMISSALS:
+                key = (object.match_id, object.innings_number, object.over_number, object.ball_number)
+                dismissed[key].add(object.player_out_name)
+        head_to_head = cls()
+        for object in lst_objects:
+            if isinstance(object, DELIVERY_TYPES):
+                key = (object.match, object.innings, object.over_number, object.ball_number)
+                head_to_head.add(player_ids[object.batsman], player_ids[object.bowler],
+                                 MATCH_TYPE_CODES.encode(object.match_type), object.runs_batsman,
+                                 int(object.extras_type != 'wides'), int(object.batsman in dismissed[key]))
+        return head_to_head
+
+    def subtract(self, other):
+        for (batsman, bowler, match_type), (runs, balls, dismissals) in list(other.records.items()):
+            if match_type is not None:
+                self.add(batsman, bowler, match_type, -runs, -balls, -dismissals)
+
+    @classmethod
+    def from_deliveries(cls, session, *criteria):
+        """ Matrix aggregated from the deliveries, filtered by criteria, and wickets tables """
+        head_to_head = cls()
+        balls = case((Delivery.extras_type == EXTRAS_TYPE_CODES.encode('wides'), 0), else_=1)
+        for batsman, bowler, match_type, runs, balls in session. \
+                query(Delivery.batsman, Delivery.bowler, Delivery.match_type,
+                      func.sum(Delivery.runs_batsman), func.sum(balls)). \
+                filter(*criteria). \
+                group_by(Delivery.batsman, Delivery.bowler, Delivery.match_type):
+            head_to_head.add(batsman, bowler, match_type, runs, balls, 0)
+        kinds = [DISMISSAL_KIND_CODES.encode(kind) for kind in BOWLER_DISMISSALS]
+        for batsman, bowler, match_type, dismissals in session. \
+                query(Delivery.batsman, Delivery.bowler, Delivery.match_type, func.count()). \
+                join(Innings, Innings.id == Delivery.innings). \
+                join(Wicket, and_(Wicket.match_id == Innings.match, Wicket.innings_number == Innings.innings_number,
+                                  Wicket.over_number == Delivery.over_number,
+                                  Wicket.ball_number == Delivery.ball_number)). \
+                join(Player, and_(Player.name == Wicket.player_out_name, Player.id == Delivery.batsman)). \
+                filter(Wicket.kind.in_(kinds), *criteria). \
+                group_by(Delivery.batsman, Delivery.bowler, Delivery.match_type):
+            head_to_head.add(batsman, bowler, match_type, 0, 0, dismissals)
+        return head_to_head
+
+    @classmethod
+    def load(cls, session, match_type=None):
+        """ Matrix read from the head_to_head table, restricted to one match type code when given """
+        head_to_head = cls()
+        query = session.query(HeadToHeadRecord)
+        if match_type is not None:
+            query = query.filter(HeadToHeadRecord.match_type == match_type)
+        for record in query:
+            head_to_head.add(record.batsman, record.bowler, record.match_type,
+                             record.runs, record.balls, record.dismissals)
+        return head_to_head
+
+    def save(self, session):
+        """ Replace the head_to_head table by this matrix """
+        session.query(HeadToHeadRecord).delete()
+        if self.records:
+            session.execute(HeadToHeadRecord.__table__.insert(), self.rows())
+
+    def upsert(self, session):
+        """ Add this matrix, built from newly loaded matches, to the head_to_head table """
+        if not self.records:
+            return
+        table = HeadToHeadRecord.__table__
+        statement = Utils.insert(session, HeadToHeadRecord)
+        statement = statement.on_conflict_do_update(
+            index_elements=['batsman', 'bowler', 'match_type'],
+            set_={column: table.c[column] + statement.excluded[column] for column in ('runs', 'balls', 'dismissals')})
+        # rows updated in key order, concurrent writers cannot deadlock locking each other's pairs
+        rows = sorted(self.rows(), key=lambda row: (row['batsman'], row['bowler'], row['match_type']))
+        session.execute(statement, rows)
+
+    @classmethod
+    def rebuild(cls, session):
+        head_to_head = cls.from_deliveries(session)
+        head_to_head.save(session)
+        return head_to_head
@@ -0,0 +1,69 @@
+ILLEGAL_EXTRAS = ('wides', 'noballs')
+NOT_OUT_DISMISSALS = ('retired hurt', 'retired not out')
+
+POWERPLAY = 'powerplay'
+MIDDLE = 'middle'
+DEATH = 'death'
+
+# (powerplay overs, death overs) for the common formats, other lengths are scaled from T20
+PHASE_OVERS = {20: (6, 4), 50: (10, 10)}
+
+
+def phase_overs(max_overs):
+    if max_overs in PHASE_OVERS:
+        return PHASE_OVERS[max_overs]
+    return max(1, round(max_overs * 0.3)), max(1, round(max_overs * 0.2))
+
+
+class InningsStateTracker:
+    """
+    Derive the match state after every ball of an innings in a single pass.
+    Deliveries must be fed in the order they were bowled.
+    """
+
+    def __init__(self, max_overs=None, target=None):
+        self.max_overs = int(max_overs) if max_overs else None
+        self.target = target
+        self.legal_balls = 0
+        self.runs = 0
+        self.wickets = 0
+        if self.max_overs:
+            self.powerplay_overs, self.death_overs = phase_overs(self.max_overs)
+
+    def advance(self, runs_total, extras_type=None, wickets=0):
+        """ Count one ball, wickets being the dismissals that are not retirements """
+        if extras_type not in ILLEGAL_EXTRAS:
+            self.legal_balls += 1
+        self.runs += runs_total
+        self.wickets += wickets
+
+    def update(self, over_number, runs_total, extras_type=None, dismissal_kinds=()):
+        self.advance(runs_total, extras_type, sum(1 for kind in dismissal_kinds if kind not in NOT_OUT_DISMISSALS))
+        return {
+            'legal_ball_number': self.legal_balls,
+            'cumulative_runs': self.runs,
+            'cumulative_wickets': self.wickets,
+            'phase': self.phase(int(over_number)),
+            'target': self.target,
+            'required_run_rate': self.required_run_rate()
+        }
+
+    def phase(self, over_number):
+        if not self.max_overs:
+            return None
+        if over_number < self.powerplay_overs:
+            return POWERPLAY
+        if over_number >= self.max_overs - self.death_overs:
+            return DEATH
+        return MIDDLE
+
+    def required_run_rate(self):
+        if not (self.target and self.max_overs):
+            return None
+        runs_needed = self.target - self.runs
+        if runs_needed <= 0:
+            return 0
+        balls_remaining = self.max_overs * 6 - self.legal_balls
+        if balls_remaining <= 0:
+            return None
+        return round(runs_needed * 6 / balls_remaining, 2)
@@ -0,0 +1,140 @@
+from sqlalchemy import MetaData, Table, Integer, String, inspect, select, case, cast, func, text
+from sqlalchemy.orm import Session
+
+from cricket_db.models import Match, Innings, Delivery, Wicket, ExtrasType, DismissalKind, Phase, MatchType, \
+    City, Venue, VenueAlias
+from cricket_db.codes import EXTRAS_TYPE_CODES, DISMISSAL_KIND_CODES, PHASE_CODES, MATCH_TYPE_CODES
+from cricket_db.cricsheet_xml_reader import CricsheetXMLReader
+from cricket_db.utils import Utils
+from cricket_db.venues import VenueAliases
+
+LEGACY_SUFFIX = '_legacy'
+
+
+class CompactSchemaMigration:
+    """
+    Migrate a Postgres or SQLite database created before the venue and city dimensions
+    and the compact schema. The venue and city names of matches are upserted into the
+    venues and cities tables, venues through their aliases like the loader does, and
+    swapped in place for their ids. innings, deliveries and wickets are renamed aside,
+    recreated from the models and refilled with INSERT ... SELECT, turning innings names
+    ('1st innings') into numbers and extras types, phases and dismissal kinds into their
+    codes, and copying match type and season from the match onto deliveries and wickets.
+    Ids are kept and everything runs in one transaction.
+    """
+
+    MODELS = (Innings, Delivery, Wicket)
+    LOOKUP_MODELS = (ExtrasType, DismissalKind, Phase, MatchType)
+    DIMENSION_MODELS = (City, Venue, VenueAlias)
+    CODED_COLUMNS = {
+        ('deliveries', 'extras_type'): EXTRAS_TYPE_CODES,
+        ('deliveries', 'phase'): PHASE_CODES,
+        ('wickets', 'kind'): DISMISSAL_KIND_CODES,
+    }
+    INNINGS_NUMBER_COLUMNS = (('innings', 'innings_number'), ('wickets', 'innings_number'))
+    MATCH_COLUMNS = {'deliveries': 'match', 'wickets': 'match_id'}
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    @staticmethod
+    def has_string_column(connection, table_name, column_name):
+        columns = {column['name']: column['type'] for column in inspect(connection).get_columns(table_name)}
+        return isinstance(columns[column_name], String)
+
+    def is_required(self, connection):
+        return self.has_string_column(connection, 'innings', 'innings_number')
+
+    def run(self):
+        """ Migrate the database, return False when it already has the dimensions and the compact schema """
+        migrated = False
+        with self.engine.begin() as connection:
+            for model in self.LOOKUP_MODELS + self.DIMENSION_MODELS:
+                model.__table__.create(connection, checkfirst=True)
+            if self.has_string_column(connection, 'matches', 'venue'):
+                self.migrate_match_dimensions(connection)
+                migrated = True
+            if self.is_required(connection):
+                for model in self.MODELS:
+                    self.rename_legacy(connection, model.__table__)
+                for model in self.MODELS:
+                    model.__table__.create(connection, checkfirst=True)
+                    self.copy_legacy(connection, model.__table__)
+                for model in reversed(self.MODELS):
+                    connection.execute(text(f'DROP TABLE {model.__tablename__}{LEGACY_SUFFIX}'))
+                migrated = True
+        return migrated
+
+    def migrate_match_dimensions(self, connection):
+        """
+        Upsert the venue and city names of matches and replace both columns by integer
+        columns referencing venues and cities. The columns are swapped in place, so the
+        tables referencing matches are left alone.
+        """
+        venues = list(connection.execute(text('SELECT DISTINCT venue, city FROM matches')))
+        session = Session(bind=connection)
+        Utils.bulk_get_or_create(session, City, {city for venue, city in venues})
+        VenueAliases.bulk_get_or_create(session, venues)
+        lookups = {
+            'venue': (Venue.__tablename__, f'SELECT venue FROM {VenueAlias.__tablename__} '
+                                           f'WHERE {VenueAlias.__tablename__}.name = matches.venue'),
+            'city': (City.__tablename__, f'SELECT id FROM {City.__tablename__} '
+                                         f'WHERE {City.__tablename__}.name = matches.city'),
+        }
+        for column, (table_name, lookup) in lookups.items():
+            connection.execute(text(f'ALTER TABLE matches ADD COLUMN {column}_id INTEGER '
+                                    f'CONSTRAINT matches_{column}_fkey REFERENCES {table_name} (id)'))
+            connection.execute(text(f'UPDATE matches SET {column}_id = ({lookup})'))
+            connection.execute(text(f'ALTER TABLE matches DROP COLUMN {column}'))
+            connection.execute(text(f'ALTER TABLE matches RENAME COLUMN {column}_id TO {column}'))
+        for index in Match.__table__.indexes:
+            index.create(connection, checkfirst=True)
+
+    def rename_legacy(self, connection, table):
+        """ Move a table aside, freeing the index, constraint and sequence names the new table needs """
+        legacy_name = table.name + LEGACY_SUFFIX
+        connection.execute(text(f'ALTER TABLE {table.name} RENAME TO {legacy_name}'))
+        inspector = inspect(connection)
+        index_names = [index['name'] for index in inspector.get_indexes(legacy_name)]
+        if connection.dialect.name == 'postgresql':
+            index_names.append(inspector.get_pk_constraint(legacy_name)['name'])
+            index_names.extend(constraint['name'] for constraint in inspector.get_unique_constraints(legacy_name))
+            for index_name in set(filter(None, index_names)):
+                connection.execute(text(f'ALTER INDEX IF EXISTS {index_name} RENAME TO {index_name}{LEGACY_SUFFIX}'))
+            sequence = table.c.id.default
+            connection.execute(text(f'ALTER SEQUENCE IF EXISTS {sequence.name} OWNED BY NONE'))
+        else:
+            for index_name in index_names:
+                connection.execute(text(f'DROP INDEX IF EXISTS {index_name}'))
+
+    def copy_legacy(self, connection, table):
+        legacy = Table(table.name + LEGACY_SUFFIX, MetaData(), autoload_with=connection)
+        names = [column.name for column in table.columns if column.name in legacy.c]
+        expressions = [self.convert(connection, table.name, legacy.c[name]) for name in names]
+        if table.name in self.MATCH_COLUMNS and 'match_type' not in legacy.c:
+            names.extend(('match_type', 'season'))
+            expressions.extend(self.match_partition(legacy.c[self.MATCH_COLUMNS[table.name]]))
+        connection.execute(table.insert().from_select(names, select(*expressions)))
+
+    def match_partition(self, match_column):
+        """ Match type code and season of the match of each row """
+        matches = Match.__table__
+        match_type = case(MATCH_TYPE_CODES.codes, value=matches.c.match_type)
+        season = cast(func.substr(cast(matches.c.start_date, String), 1, 4), Integer)
+        return [select(expression).where(matches.c.id == match_column).scalar_subquery()
+                for expression in (match_type, season)]
+
+    def convert(self, connection, table_name, column):
+        key = (table_name, column.name)
+        if key in self.CODED_COLUMNS:
+            return case(self.CODED_COLUMNS[key].codes, value=column)
+        if key in self.INNINGS_NUMBER_COLUMNS:
+            return self.innings_number(connection, column)
+        return column
+
+    @staticmethod
+    def innings_number(connection, column):
+        """ Innings numbers of the legacy values of column, parsed like the reader parses innings names """
+        numbers = {value: CricsheetXMLReader.innings_ordinal(value)
+                   for value, in connection.execute(select(column).distinct()) if value is not None}
+        return case(numbers, value=column) if numbers else cast(column, Integer)
@@ -1,14 +1,24 @@
-from sqlalchemy import Column, Integer, Numeric, String, Boolean, ForeignKey, PrimaryKeyConstraint, \
-    ForeignKeyConstraint, UniqueConstraint
+from sqlalchemy import Column, Integer, SmallInteger, Numeric, String, Boolean, ForeignKey, PrimaryKeyConstraint, \
+    ForeignKeyConstraint, UniqueConstraint, Index, Sequence, event
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 
+from cricket_db.codes import EXTRAS_TYPE_CODES, DISMISSAL_KIND_CODES, PHASE_CODES, MATCH_TYPE_CODES, \
+    DISCIPLINE_CODES
+
 Base = declarative_base()
 
 
+def seed_codes(codes):
+    """ Fill a code lookup table as soon as it is created """
+    def after_create(target, connection, **kw):
+        connection.execute(target.insert(), codes.rows())
+    return after_create
+
+
 class Team(Base):
     __tablename__ = 'teams'
-    id = Column(Integer, primary_key=True, autoincrement=True)
+    id = Column(Integer, Sequence('teams_id_seq'), primary_key=True, autoincrement=True)
     name = Column(String, unique=True)
 
     def __repr__(self):
@@ -17,7 +27,7 @@ class Team(Base):
 
 class Competition(Base):
     __tablename__ = 'competitions'
-    id = Column(Integer, primary_key=True, autoincrement=True)
+    id = Column(Integer, Sequence('competitions_id_seq'), primary_key=True, autoincrement=True)
     name = Column(String, unique=True)
 
     def __repr__(self):
@@ -26,7 +36,7 @@ class Competition(Base):
 
 class Player(Base):
     __tablename__ = 'players'
-    id = Column(Integer, primary_key=True, autoincrement=True)
+    id = Column(Integer, Sequence('players_id_seq'), primary_key=True, autoincrement=True)
     name = Column(String, unique=True)
 
     def __repr__(self):
@@ -35,23 +45,104 @@ class Player(Base):
 
 class Umpire(Base):
     __tablename__ = 'umpires'
-    id = Column(Integer, primary_key=True, autoincrement=True)
+    id = Column(Integer, Sequence('umpires_id_seq'), primary_key=True, autoincrement=True)
     name = Column(String, unique=True)
 
     def __repr__(self):
         return "<Umpire(name='%s')>" % (self.name)
 
 
+class City(Base):
+    __tablename__ = 'cities'
+    id = Column(Integer, Sequence('cities_id_seq'), primary_key=True, autoincrement=True)
+    name = Column(String, unique=True)
+
+    def __repr__(self):
+        return "<City(name='%s')>" % (self.name)
+
+
+class Venue(Base):
+    __tablename__ = 'venues'
+    id = Column(Integer, Sequence('venues_id_seq'), primary_key=True, autoincrement=True)
+    name = Column(String, unique=True)
+
+    def __repr__(self):
+        return "<Venue(name='%s')>" % (self.name)
+
+
+class VenueAlias(Base):
+    __tablename__ = 'venue_aliases'
+    name = Column(String, primary_key=True)
+    venue = Column(Integer, ForeignKey('venues.id'), nullable=False, index=True)
+
+    venue_relationship = relationship('Venue')
+
+    def __repr__(self):
+        return "<VenueAlias(name='%s', venue='%s')>" % (self.name, self.venue)
+
+
+class ExtrasType(Base):
+    __tablename__ = 'extras_types'
+    id = Column(SmallInteger, primary_key=True, autoincrement=False)
+    name = Column(String, unique=True, nullable=False)
+
+    def __repr__(self):
+        return "<ExtrasType(name='%s')>" % (self.name)
+
+
+class DismissalKind(Base):
+    __tablename__ = 'dismissal_kinds'
+    id = Column(SmallInteger, primary_key=True, autoincrement=False)
+    name = Column(String, unique=True, nullable=False)
+
+    def __repr__(self):
+        return "<DismissalKind(name='%s')>" % (self.name)
+
+
+class Phase(Base):
+    __tablename__ = 'phases'
+    id = Column(SmallInteger, primary_key=True, autoincrement=False)
+    name = Column(String, unique=True, nullable=False)
+
+    def __repr__(self):
+        return "<Phase(name='%s')>" % (self.name)
+
+
+class MatchType(Base):
+    __tablename__ = 'match_types'
+    id = Column(SmallInteger, primary_key=True, autoincrement=False)
+    name = Column(String, unique=True, nullable=False)
+
+    def __repr__(self):
+        return "<MatchType(name='%s')>" % (self.name)
+
+
+class Discipline(Base):
+    __tablename__ = 'disciplines'
+    id = Column(SmallInteger, primary_key=True, autoincrement=False)
+    name = Column(String, unique=True, nullable=False)
+
+    def __repr__(self):
+        return "<Discipline(name='%s')>" % (self.name)
+
+
+event.listen(ExtrasType.__table__, 'after_create', seed_codes(EXTRAS_TYPE_CODES))
+event.listen(DismissalKind.__table__, 'after_create', seed_codes(DISMISSAL_KIND_CODES))
+event.listen(Phase.__table__, 'after_create', seed_codes(PHASE_CODES))
+event.listen(MatchType.__table__, 'after_create', seed_codes(MATCH_TYPE_CODES))
+event.listen(Discipline.__table__, 'after_create', seed_codes(DISCIPLINE_CODES))
+
+
 class Match(Base):
     __tablename__ = 'matches'
 
-    id = Column(Integer, primary_key=True, autoincrement=True)
+    id = Column(Integer, Sequence('matches_id_seq'), primary_key=True, autoincrement=True)
     gender = Column(String, nullable=False)
     match_type = Column(String, nullable=False)
     competition = Column(Integer, ForeignKey('competitions.id'))
     max_overs = Column(Integer)
-    venue = Column(String)
-    city = Column(String)
+    venue = Column(Integer, ForeignKey('venues.id'), index=True)
+    city = Column(Integer, ForeignKey('cities.id'), index=True)
     start_date = Column(String, nullable=False)
     end_date = Column(String, nullable=False)
 
@@ -70,6 +161,9 @@ class Match(Base):
     umpire_third = Column(Integer, ForeignKey('umpires.id'))
     umpire_forth = Column(Integer, ForeignKey('umpires.id'))
 
+    competition_relationship = relationship('Competition')
+    venue_relationship = relationship('Venue')
+    city_relationship = relationship('City')
     team_home_relationship = relationship('Team', foreign_keys=[team_home])
     team_away_relationship = relationship('Team', foreign_keys=[team_away])
     winner_relationship = relationship('Team', foreign_keys=[winner])
@@ -79,6 +173,7 @@ class Match(Base):
     umpire_second_relationship = relationship('Umpire', foreign_keys=[umpire_second])
     umpire_third_relationship = relationship('Umpire', foreign_keys=[umpire_third])
     umpire_forth_relationship = relationship('Umpire', foreign_keys=[umpire_forth])
+    innings_relationship = relationship('Innings', back_populates='matches', order_by='Innings.id')
 
     def __repr__(self):
         return "<Match(id='%s', venue='%s', city='%s', match_type='%s', start_date='%s')>" % (
@@ -103,9 +198,9 @@ class Scoresheet(Base):
 class Innings(Base):
     __tablename__ = 'innings'
 
-    id = Column(Integer, primary_key=True, autoincrement=True)
+    id = Column(Integer, Sequence('innings_id_seq'), primary_key=True, autoincrement=True)
     match = Column(Integer, ForeignKey('matches.id'))
-    innings_number = Column(String)
+    innings_number = Column(SmallInteger)
     batting_team = Column(Integer, ForeignKey('teams.id'), nullable=False)
     penalty_runs_pre = Column(Integer)
     penalty_runs_post = Column(Integer)
@@ -114,8 +209,10 @@ class Innings(Base):
     __table_args__ = (UniqueConstraint('match', 'innings_number', name='_match_id_innings_number_uc'),
                       )
 
-    matches = relationship('Match')
+    matches = relationship('Match', back_populates='innings_relationship')
     teams = relationship('Team')
+    deliveries_relationship = relationship('Delivery', back_populates='all_innings',
+                                           order_by='(Delivery.over_number, Delivery.ball_number)')
 
     def __repr__(self):
         return "<Innings(id='%s', batting='%s', was_declared='%s')>" % (
@@ -125,25 +222,39 @@ class Innings(Base):
 class Delivery(Base):
     __tablename__ = 'deliveries'
 
-    id = Column(Integer, primary_key=True, autoincrement=True)
+    id = Column(Integer, Sequence('deliveries_id_seq'), primary_key=True, autoincrement=True)
     match = Column(Integer, ForeignKey('matches.id'), nullable=False)
+    match_type = Column(SmallInteger, ForeignKey('match_types.id'))
+    season = Column(SmallInteger)
     innings = Column(Integer, ForeignKey('innings.id'), nullable=False)
-    over_number = Column(Integer)
-    ball_number = Column(Integer)
+    over_number = Column(SmallInteger)
+    ball_number = Column(SmallInteger)
     batsman = Column(Integer, ForeignKey('players.id'), nullable=False)
     bowler = Column(Integer, ForeignKey('players.id'), nullable=False)
     non_striker = Column(Integer, ForeignKey('players.id'), nullable=False)
-    runs_batsman = Column(Integer, nullable=False)
+    runs_batsman = Column(SmallInteger, nullable=False)
     was_boundary = Column(Boolean, default=0)
-    runs_extras = Column(Integer, nullable=False)
-    extras_type = Column(String)
-    runs_total = Column(Integer, nullable=False)
+    runs_extras = Column(SmallInteger, nullable=False)
+    extras_type = Column(SmallInteger, ForeignKey('extras_types.id'))
+    runs_total = Column(SmallInteger, nullable=False)
     has_wicket = Column(Boolean, default=0)
-
-    all_innings = relationship('Innings', foreign_keys=[innings])
+    legal_ball_number = Column(SmallInteger)
+    cumulative_runs = Column(SmallInteger)
+    cumulative_wickets = Column(SmallInteger)
+    phase = Column(SmallInteger, ForeignKey('phases.id'))
+    target = Column(SmallInteger)
+    required_run_rate = Column(Numeric(precision=6, scale=2))
+
+    all_innings = relationship('Innings', foreign_keys=[innings], back_populates='deliveries_relationship')
+    batsman_relationship = relationship('Player', foreign_keys=[batsman])
+    bowler_relationship = relationship('Player', foreign_keys=[bowler])
+    non_striker_relationship = relationship('Player', foreign_keys=[non_striker])
 
     __table_args__ = (
         UniqueConstraint('match', 'innings', 'over_number', 'ball_number', name='_delivery_uc'),
+        Index('_delivery_innings_legal_ball_idx', 'innings', 'legal_ball_number'),
+        Index('_delivery_phase_idx', 'phase', 'innings'),
+        Index('_delivery_match_type_season_idx', 'match_type', 'season'),
     )
 
     def __repr__(self):
@@ -154,12 +265,14 @@ class Delivery(Base):
 class Wicket(Base):
     __tablename__ = 'wickets'
 
-    id = Column(Integer, primary_key=True)
+    id = Column(Integer, Sequence('wickets_id_seq'), primary_key=True)
     match_id = Column(Integer, nullable=False)
-    innings_number = Column(Integer, nullable=False)
-    over_number = Column(Integer, nullable=False)
-    ball_number = Column(Integer, nullable=False)
-    kind = Column(String, nullable=False)
+    match_type = Column(SmallInteger, ForeignKey('match_types.id'))
+    season = Column(SmallInteger)
+    innings_number = Column(SmallInteger, nullable=False)
+    over_number = Column(SmallInteger, nullable=False)
+    ball_number = Column(SmallInteger, nullable=False)
+    kind = Column(SmallInteger, ForeignKey('dismissal_kinds.id'), nullable=False)
     player_out_name = Column(String, ForeignKey('players.name'), nullable=False)
     fielder_name = Column(String, ForeignKey('players.name'))
 
@@ -170,3 +283,128 @@ class Wicket(Base):
     def __repr__(self):
         return "<Wicket(player_out='%s', kind='%s')>" % (
             self.batsman_name, self.kind)
+
+
+class HeadToHeadRecord(Base):
+    __tablename__ = 'head_to_head'
+
+    batsman = Column(Integer, ForeignKey('players.id'), primary_key=True)
+    bowler = Column(Integer, ForeignKey('players.id'), primary_key=True)
+    match_type = Column(SmallInteger, ForeignKey('match_types.id'), primary_key=True)
+    runs = Column(Integer, nullable=False, default=0)
+    balls = Column(Integer, nullable=False, default=0)
+    dismissals = Column(Integer, nullable=False, default=0)
+
+    batsman_relationship = relationship('Player', foreign_keys=[batsman])
+    bowler_relationship = relationship('Player', foreign_keys=[bowler])
+
+    __table_args__ = (
+        Index('_head_to_head_bowler_idx', 'bowler', 'batsman'),
+    )
+
+    def __repr__(self):
+        return "<HeadToHeadRecord(batsman='%s', bowler='%s', runs='%s', balls='%s', dismissals='%s')>" % (
+            self.batsman, self.bowler, self.runs, self.balls, self.dismissals)
+
+
+class PlayerInnings(Base):
+    __tablename__ = 'player_innings'
+
+    player = Column(Integer, ForeignKey('players.id'), primary_key=True)
+    match_type = Column(SmallInteger, ForeignKey('match_types.id'), primary_key=True)
+    discipline = Column(SmallInteger, ForeignKey('disciplines.id'), primary_key=True)
+    sequence = Column(Integer, primary_key=True)
+    match = Column(Integer, ForeignKey('matches.id'), nullable=False)
+    innings_number = Column(SmallInteger, nullable=False)
+    start_date = Column(String, nullable=False)
+    runs = Column(Integer, nullable=False, default=0)
+    balls = Column(Integer, nullable=False, default=0)
+    dismissed = Column(Boolean, nullable=False, default=False)
+    wickets = Column(Integer, nullable=False, default=0)
+    runs_conceded = Column(Integer, nullable=False, default=0)
+    balls_bowled = Column(Integer, nullable=False, default=0)
+
+    player_relationship = relationship('Player')
+
+    __table_args__ = (
+        UniqueConstraint('player', 'discipline', 'match', 'innings_number', name='_player_innings_uc'),
+    )
+
+    def __repr__(self):
+        return "<PlayerInnings(player='%s', match='%s', innings_number='%s', runs='%s', wickets='%s')>" % (
+            self.player, self.match, self.innings_number, self.runs, self.wickets)
+
+
+class PlayerFormRecord(Base):
+    __tablename__ = 'player_form'
+
+    player = Column(Integer, ForeignKey('players.id'), primary_key=True)
+    match_type = Column(SmallInteger, ForeignKey('match_types.id'), primary_key=True)
+    discipline = Column(SmallInteger, ForeignKey('disciplines.id'), primary_key=True)
+    window_size = Column(SmallInteger, primary_key=True)
+    sequence = Column(Integer, primary_key=True)
+    match = Column(Integer, ForeignKey('matches.id'), nullable=False)
+    start_date = Column(String, nullable=False)
+    innings = Column(SmallInteger, nullable=False)
+    runs = Column(Integer, nullable=False)
+    balls = Column(Integer, nullable=False)
+    dismissals = Column(Integer, nullable=False)
+    wickets = Column(Integer, nullable=False)
+    runs_conceded = Column(Integer, nullable=False)
+    balls_bowled = Column(Integer, nullable=False)
+    batting_average = Column(Numeric(precision=7, scale=2))
+    strike_rate = Column(Numeric(precision=7, scale=2))
+    economy = Column(Numeric(precision=6, scale=2))
+
+    player_relationship = relationship('Player')
+
+    def __repr__(self):
+        return "<PlayerFormRecord(player='%s', window_size='%s', sequence='%s', runs='%s', wickets='%s')>" % (
+            self.player, self.window_size, self.sequence, self.runs, self.wickets)
+
+
+class Partnership(Base):
+    __tablename__ = 'partnerships'
+
+    match = Column(Integer, ForeignKey('matches.id'), primary_key=True)
+    innings_number = Column(SmallInteger, primary_key=True)
+    partnership_number = Column(SmallInteger, primary_key=True)
+    match_type = Column(SmallInteger, ForeignKey('match_types.id'))
+    season = Column(SmallInteger)
+    wicket_number = Column(SmallInteger, nullable=False)
+    batsman_first = Column(Integer, ForeignKey('players.id'), nullable=False)
+    batsman_second = Column(Integer, ForeignKey('players.id'), nullable=False)
+    runs = Column(Integer, nullable=False)
+    balls = Column(Integer, nullable=False)
+    batsman_first_runs = Column(Integer, nullable=False)
+    batsman_second_runs = Column(Integer, nullable=False)
+    start_score = Column(Integer, nullable=False)
+    end_score = Column(Integer, nullable=False)
+    end_over = Column(SmallInteger)
+    end_ball = Column(SmallInteger)
+    ended_by = Column(SmallInteger, ForeignKey('dismissal_kinds.id'))
+    player_out = Column(Integer, ForeignKey('players.id'))
+
+    batsman_first_relationship = relationship('Player', foreign_keys=[batsman_first])
+    batsman_second_relationship = relationship('Player', foreign_keys=[batsman_second])
+
+    __table_args__ = (
+        Index('_partnership_batsmen_idx', 'batsman_first', 'batsman_second'),
+    )
+
+    def __repr__(self):
+        return "<Partnership(match='%s', innings_number='%s', wicket_number='%s', runs='%s', balls='%s')>" % (
+            self.match, self.innings_number, self.wicket_number, self.runs, self.balls)
+
+
+class IngestCheckpoint(Base):
+    __tablename__ = 'ingest_checkpoints'
+
+    file_name = Column(String, primary_key=True)
+    batch = Column(Integer, index=True)
+    status = Column(String, nullable=False)
+    reason = Column(String)
+
+    def __repr__(self):
+        return "<IngestCheckpoint(file_name='%s', batch='%s', status='%s')>" % (
+            self.file_name, self.batch, self.status)
@@ -17,7 +17,7 @@ class DeliveryParser(Parser):
             'batsman': raw['batsman'],
             'bowler': raw['bowler'],
             'non_striker': raw['non_striker'],
-            'has_wicket': ('wickets' in raw)
+            'has_wicket': ('wicket' in raw)
         }
         if 'runs' in raw:
             delivery.update(self.__runs_parser(raw['runs']))
@@ -0,0 +1,80 @@
+from collections import namedtuple
+
+from cricket_db.models import Delivery, Wicket
+from cricket_db.parsers.parser import Parser
+from cricket_db.innings_state import NOT_OUT_DISMISSALS
+
+DELIVERY_FIELDS = ('match', 'innings', 'over_number', 'ball_number', 'batsman', 'bowler', 'non_striker',
+                   'has_wicket', 'runs_batsman', 'was_boundary', 'runs_extras', 'runs_total', 'extras_type',
+                   'legal_ball_number', 'cumulative_runs', 'cumulative_wickets', 'phase', 'target',
+                   'required_run_rate', 'match_type', 'season')
+WICKET_FIELDS = ('match_id', 'innings_number', 'over_number', 'ball_number', 'kind', 'player_out_name',
+                 'fielder_name', 'match_type', 'season')
+
+DeliveryRow = namedtuple('DeliveryRow', DELIVERY_FIELDS)
+WicketRow = namedtuple('WicketRow', WICKET_FIELDS)
+
+ROW_MODELS = {DeliveryRow: Delivery, WicketRow: Wicket}
+MODEL_FIELDS = {Delivery: DELIVERY_FIELDS, Wicket: WICKET_FIELDS}
+# deliveries and wickets come as model instances or rows
+DELIVERY_TYPES = (Delivery, DeliveryRow)
+WICKET_TYPES = (Wicket, WicketRow)
+
+
+def to_model(row):
+    """ Transient model instance with the values of a row """
+    return ROW_MODELS[type(row)](**row._asdict())
+
+
+def to_dict(object):
+    """ Values by field of a row or of a delivery or wicket model instance """
+    if isinstance(object, tuple):
+        return object._asdict()
+    return {field: getattr(object, field) for field in MODEL_FIELDS[type(object)]}
+
+
+class InningsFlattener(Parser):
+    """
+    Flatten the deliveries of one innings in a single pass into DeliveryRow and
+    WicketRow tuples, in the order they were bowled with the wickets after their
+    delivery. Produces the same values as DeliveryParser, WicketParser and
+    InningsStateTracker.update without a parser object or dict per ball.
+    """
+
+    def __init__(self, match_id, innings_number, match_type, season):
+        self.match_id = match_id
+        self.innings_number = innings_number
+        self.match_type = match_type
+        self.season = season
+
+    def parse(self, raw_deliveries, innings_state):
+        rows = []
+        append = rows.append
+        match_id, innings_number, match_type, season = self.match_id, self.innings_number, self.match_type, self.season
+        if not isinstance(raw_deliveries, list):
+            raw_deliveries = [raw_deliveries]
+        for delivery in raw_deliveries:
+            for key, raw in delivery.items():
+                over, _, ball = str(key).partition('.')
+                over_number, ball_number = int(over), int(ball)
+                runs = raw['runs']
+                runs_batsman, runs_extras, runs_total = runs['batsman'], runs['extras'], runs['total']
+                was_boundary = 'non_boundary' not in runs and (runs_batsman == 4 or runs_batsman == 6)
+                extras_type = next(iter(raw['extras'])) if 'extras' in raw else None
+                raw_wickets = raw.get('wicket', ())
+                if not isinstance(raw_wickets, (list, tuple)):
+                    raw_wickets = (raw_wickets,)
+                innings_state.advance(runs_total, extras_type,
+                                      sum(1 for wicket in raw_wickets if wicket['kind'] not in NOT_OUT_DISMISSALS))
+                append(DeliveryRow(match_id, innings_number, over_number, ball_number, raw['batsman'],
+                                   raw['bowler'], raw['non_striker'], 'wicket' in raw, runs_batsman, was_boundary,
+                                   runs_extras, runs_total, extras_type, innings_state.legal_balls,
+                                   innings_state.runs, innings_state.wickets, innings_state.phase(over_number),
+                                   innings_state.target, innings_state.required_run_rate(), match_type, season))
+                for wicket in raw_wickets:
+                    fielders = wicket.get('fielders')
+                    if isinstance(fielders, list):
+                        fielders = fielders[0]
+                    append(WicketRow(match_id, innings_number, over_number, ball_number, wicket['kind'],
+                                     wicket['player_out'], fielders, match_type, season))
+        return rows
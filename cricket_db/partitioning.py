@@ -0,0 +1,96 @@
+from sqlalchemy import ForeignKeyConstraint, UniqueConstraint, inspect, text
+from sqlalchemy.schema import AddConstraint, CreateColumn
+
+from cricket_db.models import Base, Delivery, Wicket
+from cricket_db.codes import MATCH_TYPE_CODES
+
+PARTITION_COLUMNS = ('match_type', 'season')
+# arbitrary key of the advisory lock serialising partition creation between writers
+PARTITION_LOCK = 0x637269636b6574
+
+
+class PostgresPartitions:
+    """
+    Declaratively partitioned layout of deliveries and wickets on Postgres. Each table
+    is list partitioned by match type and every match type partition is range
+    partitioned by season, one partition per year, e.g. deliveries_t20_2020.
+    Season partitions are created on demand before rows are inserted, Postgres then
+    routes rows inserted into the parent table to them.
+    """
+
+    MODELS = (Delivery, Wicket)
+
+    def __init__(self, engine):
+        self.engine = engine
+
+    def create_tables(self):
+        """
+        Create the schema with partitioned parents for deliveries and wickets. Raises a ValueError
+        before creating anything when the database is not Postgres or holds them unpartitioned.
+        """
+        if self.engine.dialect.name != 'postgresql':
+            raise ValueError(f'The partitioned layout needs Postgres, the database is {self.engine.dialect.name}')
+        tables = [model.__table__ for model in self.MODELS]
+        with self.engine.begin() as connection:
+            for model in self.MODELS:
+                if self.relkind(connection, model.__tablename__) not in (None, 'p'):
+                    raise ValueError(f'{model.__tablename__} exists unpartitioned, load into a new database '
+                                     f'or without the partitioned layout')
+            Base.metadata.create_all(connection, tables=[table for table in Base.metadata.sorted_tables
+                                                         if table not in tables])
+            inspector = inspect(connection)
+            for model in self.MODELS:
+                if not inspector.has_table(model.__tablename__):
+                    self.create_table(connection, model.__table__)
+
+    @staticmethod
+    def relkind(connection, table_name):
+        """ Kind of the table_name relation in pg_class, 'p' when partitioned, None when missing """
+        return connection.execute(text('SELECT relkind FROM pg_class WHERE oid = to_regclass(:name)'),
+                                  {'name': table_name}).scalar()
+
+    def create_table(self, connection, table):
+        table.c.id.default.create(connection, checkfirst=True)
+        definitions = [str(CreateColumn(column).compile(dialect=connection.dialect)) for column in table.columns]
+        # unique keys of a partitioned table must contain the partition key
+        definitions.append(f"PRIMARY KEY ({', '.join(('id',) + PARTITION_COLUMNS)})")
+        for constraint in table.constraints:
+            if isinstance(constraint, UniqueConstraint):
+                columns = [column.name for column in constraint.columns] + list(PARTITION_COLUMNS)
+                definitions.append(f"CONSTRAINT {constraint.name} UNIQUE ({', '.join(columns)})")
+        connection.execute(text(
+            f"CREATE TABLE {table.name} ({', '.join(definitions)}) PARTITION BY LIST (match_type)"))
+        for constraint in table.constraints:
+            if isinstance(constraint, ForeignKeyConstraint):
+                connection.execute(AddConstraint(constraint))
+        for index in table.indexes:
+            index.create(connection)
+
+    @staticmethod
+    def partition_name(table_name, match_type, season=None):
+        name = f'{table_name}_{MATCH_TYPE_CODES.decode(match_type).lower()}'
+        return name if season is None else f'{name}_{season}'
+
+    def ensure_partitions(self, session, keys):
+        """ Create the missing partitions for keys, an iterable of (match type code, season) """
+        keys = sorted(set(keys))
+        if not keys:
+            return
+        session.execute(text('SELECT pg_advisory_xact_lock(:key)'), {'key': PARTITION_LOCK})
+        for model in self.MODELS:
+            table_name = model.__tablename__
+            for match_type in sorted({match_type for match_type, season in keys}):
+                session.execute(text(
+                    f'CREATE TABLE IF NOT EXISTS {self.partition_name(table_name, match_type)} '
+                    f'PARTITION OF {table_name} FOR VALUES IN ({int(match_type)}) PARTITION BY RANGE (season)'))
+            for match_type, season in keys:
+                session.execute(text(
+                    f'CREATE TABLE IF NOT EXISTS {self.partition_name(table_name, match_type, season)} '
+                    f'PARTITION OF {self.partition_name(table_name, match_type)} '
+                    f'FOR VALUES FROM ({int(season)}) TO ({int(season) + 1})'))
+
+    def truncate_partition(self, session, match_type, season):
+        """ Empty the deliveries and wickets partitions of one match type and season """
+        self.ensure_partitions(session, [(match_type, season)])
+        names = ', '.join(self.partition_name(model.__tablename__, match_type, season) for model in self.MODELS)
+        session.execute(text(f'TRUNCATE {names}'))
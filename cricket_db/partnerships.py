@@ -0,0 +1,159 @@
+from collections import defaultdict
+
+from sqlalchemy import and_, or_, select
+
+from cricket_db.models import Delivery, Innings, Player, Wicket, Partnership
+from cricket_db.codes import EXTRAS_TYPE_CODES, DISMISSAL_KIND_CODES, MATCH_TYPE_CODES
+from cricket_db.innings_state import ILLEGAL_EXTRAS, NOT_OUT_DISMISSALS
+from cricket_db.parsers.flatten import DELIVERY_TYPES, WICKET_TYPES
+
+# deliveries fetched and partnerships written per round trip by a rebuild
+REBUILD_CHUNK_SIZE = 10000
+
+
+class PartnershipTracker:
+    """
+    Partnerships of one innings, fed its deliveries and their dismissals in order.
+    A partnership ends with a dismissal, retirements included, or when a delivery
+    shows another pair of batsmen at the crease. batsman_first is the batsman who
+    was in already, the striker of the first ball for the openers.
+    """
+
+    def __init__(self):
+        self.partnerships = []
+        self.current = None
+        self.wickets = 0
+        self.runs = 0
+
+    def start(self, batsman, non_striker):
+        previous = self.partnerships[-1] if self.partnerships else None
+        first, second = batsman, non_striker
+        if previous and non_striker in (previous['batsman_first'], previous['batsman_second']):
+            first, second = non_striker, batsman
+        self.current = {
+            'partnership_number': len(self.partnerships) + 1, 'wicket_number': self.wickets + 1,
+            'batsman_first': first, 'batsman_second': second, 'runs': 0, 'balls': 0,
+            'batsman_first_runs': 0, 'batsman_second_runs': 0, 'start_score': self.runs, 'end_score': self.runs,
+            'end_over': None, 'end_ball': None, 'ended_by': None, 'player_out': None}
+        self.partnerships.append(self.current)
+
+    def delivery(self, batsman, non_striker, runs_batsman, runs_total, extras_type, over_number, ball_number):
+        if self.current and {batsman, non_striker} != {self.current['batsman_first'], self.current['batsman_second']}:
+            self.current = None
+        if self.current is None:
+            self.start(batsman, non_striker)
+        partnership = self.current
+        self.runs += runs_total
+        partnership['runs'] += runs_total
+        partnership['balls'] += int(extras_type not in ILLEGAL_EXTRAS)
+        if batsman == partnership['batsman_first']:
+            partnership['batsman_first_runs'] += runs_batsman
+        else:
+            partnership['batsman_second_runs'] += runs_batsman
+        partnership['end_score'] = self.runs
+        partnership['end_over'], partnership['end_ball'] = over_number, ball_number
+
+    def wicket(self, kind, player_out):
+        if kind not in NOT_OUT_DISMISSALS:
+            self.wickets += 1
+        if self.current is not None:
+            self.current['ended_by'], self.current['player_out'] = kind, player_out
+            self.current = None
+
+
+class Partnerships:
+
+    @staticmethod
+    def rows(trackers, partitions):
+        """ Partnership rows of trackers keyed (match, innings number), partitions maps match to its type and season """
+        rows = []
+        for (match, innings_number), tracker in trackers.items():
+            match_type, season = partitions[match]
+            for partnership in tracker.partnerships:
+                rows.append(dict(partnership, match=match, innings_number=innings_number, match_type=match_type,
+                                 season=season, ended_by=DISMISSAL_KIND_CODES.encode(partnership['ended_by'])
+                                 if partnership['ended_by'] else None))
+        return rows
+
+    @staticmethod
+    def from_objects(lst_objects, player_ids):
+        """ Partnership rows of the deliveries and wickets of scoresheets as read, in one pass """
+        trackers = defaultdict(PartnershipTracker)
+        partitions = {}
+        for object in lst_objects:
+            if isinstance(object, DELIVERY_TYPES):
+                partitions[object.match] = (MATCH_TYPE_CODES.encode(object.match_type), object.season)
+                trackers[(object.match, object.innings)].delivery(
+                    player_ids[object.batsman], player_ids[object.non_striker], object.runs_batsman,
+                    object.runs_total, object.extras_type, object.over_number, object.ball_number)
+            elif isinstance(object, WICKET_TYPES):
+                trackers[(object.match_id, object.innings_number)].wicket(
+                    object.kind, player_ids[object.player_out_name])
+        return Partnerships.rows(trackers, partitions)
+
+    @staticmethod
+    def insert(session, rows):
+        if rows:
+            session.execute(Partnership.__table__.insert(), rows)
+
+    @staticmethod
+    def delete(session, match_ids):
+        session.query(Partnership).filter(Partnership.match.in_(list(match_ids))).delete(synchronize_session=False)
+
+    @staticmethod
+    def wickets(connection, match_ids):
+        """ Dismissal kind and player out id of the wickets of match_ids keyed by delivery """
+        wickets = defaultdict(list)
+        for match, innings_number, over_number, ball_number, kind, player_out in connection.execute(
+                select(Wicket.match_id, Wicket.innings_number, Wicket.over_number, Wicket.ball_number, Wicket.kind,
+                       Player.id).
+                join(Player, Player.name == Wicket.player_out_name).
+                where(Wicket.match_id.in_(match_ids)).order_by(Wicket.id)):
+            wickets[(match, innings_number, over_number, ball_number)].append(
+                (DISMISSAL_KIND_CODES.decode(kind), player_out))
+        return wickets
+
+    @staticmethod
+    def rebuild(session):
+        """
+        Recompute the partnerships table from deliveries and wickets. The session streams the
+        deliveries a chunk at a time, a second connection reads the wickets of every chunk and
+        writes the partnerships as they fill a chunk, in its own transaction committed at the end.
+        """
+        query = select(Delivery.match, Innings.innings_number, Delivery.match_type, Delivery.season,
+                       Delivery.over_number, Delivery.ball_number, Delivery.batsman, Delivery.non_striker,
+                       Delivery.runs_batsman, Delivery.runs_total, Delivery.extras_type). \
+            join(Innings, Innings.id == Delivery.innings). \
+            order_by(Delivery.match, Innings.innings_number, Delivery.over_number, Delivery.ball_number). \
+            execution_options(yield_per=REBUILD_CHUNK_SIZE)
+        # the cursor streaming the deliveries may not be shared, e.g. on DuckDB
+        with session.get_bind().begin() as connection:
+            connection.execute(Partnership.__table__.delete())
+            trackers, partitions, rows = {}, {}, []
+            for chunk in session.execute(query).partitions():
+                wickets = Partnerships.wickets(connection, {row.match for row in chunk})
+                for match, innings_number, match_type, season, over_number, ball_number, batsman, non_striker, \
+                        runs_batsman, runs_total, extras_type in chunk:
+                    if (match, innings_number) not in trackers:
+                        rows.extend(Partnerships.rows(trackers, partitions))
+                        trackers = {(match, innings_number): PartnershipTracker()}
+                        partitions = {match: (match_type, season)}
+                    tracker = trackers[(match, innings_number)]
+                    tracker.delivery(batsman, non_striker, runs_batsman, runs_total,
+                                     EXTRAS_TYPE_CODES.decode(extras_type) if extras_type else None,
+                                     over_number, ball_number)
+                    for kind, player_out in wickets.get((match, innings_number, over_number, ball_number), ()):
+                        tracker.wicket(kind, player_out)
+                if len(rows) >= REBUILD_CHUNK_SIZE:
+                    Partnerships.insert(connection, rows)
+                    rows = []
+            rows.extend(Partnerships.rows(trackers, partitions))
+            Partnerships.insert(connection, rows)
+
+    @staticmethod
+    def between(session, batsman, other_batsman):
+        """ Partnerships of two batsmen, whichever came in first """
+        return session.query(Partnership). \
+            filter(or_(and_(Partnership.batsman_first == batsman, Partnership.batsman_second == other_batsman),
+                       and_(Partnership.batsman_first == other_batsman, Partnership.batsman_second == batsman))). \
+            order_by(Partnership.match, Partnership.innings_number, Partnership.partnership_number).all()
@@ -0,0 +1,122 @@
+from collections import defaultdict
+
+from sqlalchemy.orm import joinedload, selectinload
+
+from cricket_db.models import Match, Innings, Delivery, Wicket
+from cricket_db.codes import EXTRAS_TYPE_CODES, DISMISSAL_KIND_CODES, PHASE_CODES
+
+MATCH_NAME_RELATIONSHIPS = (
+    ('competition', Match.competition_relationship),
+    ('venue', Match.venue_relationship),
+    ('city', Match.city_relationship),
+    ('team_home', Match.team_home_relationship),
+    ('team_away', Match.team_away_relationship),
+    ('winner', Match.winner_relationship),
+    ('toss_won_by', Match.toss_won_by_relationship),
+    ('player_of_match', Match.player_of_match_relationship),
+    ('umpire_first', Match.umpire_first_relationship),
+    ('umpire_second', Match.umpire_second_relationship),
+    ('umpire_third', Match.umpire_third_relationship),
+    ('umpire_forth', Match.umpire_forth_relationship),
+)
+
+MATCH_COLUMNS = ('id', 'gender', 'match_type', 'max_overs', 'start_date', 'end_date', 'result', 'method',
+                 'won_by_type', 'won_by_value', 'toss_decision')
+
+DELIVERY_COLUMNS = ('over_number', 'ball_number', 'runs_batsman', 'was_boundary', 'runs_extras',
+                    'runs_total', 'has_wicket', 'legal_ball_number', 'cumulative_runs', 'cumulative_wickets',
+                    'target', 'required_run_rate')
+
+
+class MatchRepository:
+    """
+    Read complete match documents (match with resolved names, innings, deliveries
+    and wickets) for a batch of matches in a constant number of queries.
+    """
+
+    def __init__(self, session):
+        self.session = session
+
+    def get_match_documents(self, match_ids):
+        """ Return the documents of the given matches, ordered by match id """
+        match_ids = list(match_ids)
+        if not match_ids:
+            return []
+        query = self.session.query(Match). \
+            options(*[joinedload(relationship) for _, relationship in MATCH_NAME_RELATIONSHIPS]). \
+            options(selectinload(Match.innings_relationship).joinedload(Innings.teams),
+                    selectinload(Match.innings_relationship).selectinload(Innings.deliveries_relationship).
+                    joinedload(Delivery.batsman_relationship),
+                    selectinload(Match.innings_relationship).selectinload(Innings.deliveries_relationship).
+                    joinedload(Delivery.bowler_relationship),
+                    selectinload(Match.innings_relationship).selectinload(Innings.deliveries_relationship).
+                    joinedload(Delivery.non_striker_relationship)). \
+            filter(Match.id.in_(match_ids)). \
+            order_by(Match.id)
+        matches = query.all()
+        wickets = self.get_wickets(match_ids)
+        return [self.match_document(match, wickets[match.id]) for match in matches]
+
+    def iter_match_documents(self, chunk_size=100, **filters):
+        """
+        Stream the documents of every match matching filters. Match ids are read through
+        a server side cursor and documents are fetched chunk_size matches at a time.
+        """
+        query = self.session.query(Match.id).filter_by(**filters).order_by(Match.id). \
+            execution_options(stream_results=True).yield_per(chunk_size)
+        chunk = []
+        for match_id, in query:
+            chunk.append(match_id)
+            if len(chunk) == chunk_size:
+                yield from self.get_match_documents(chunk)
+                chunk = []
+        if chunk:
+            yield from self.get_match_documents(chunk)
+
+    def get_wickets(self, match_ids):
+        """ Return wickets of the given matches keyed by match id and then delivery """
+        wickets = defaultdict(lambda: defaultdict(list))
+        for wicket in self.session.query(Wicket).filter(Wicket.match_id.in_(match_ids)):
+            key = (wicket.innings_number, wicket.over_number, wicket.ball_number)
+            wickets[wicket.match_id][key].append({
+                'kind': DISMISSAL_KIND_CODES.decode(wicket.kind),
+                'player_out': wicket.player_out_name,
+                'fielder': wicket.fielder_name
+            })
+        return wickets
+
+    def match_document(self, match, wickets):
+        document = {column: getattr(match, column) for column in MATCH_COLUMNS}
+        for column, relationship in MATCH_NAME_RELATIONSHIPS:
+            document[column] = self.name(getattr(match, relationship.key))
+        document['innings'] = [self.innings_document(innings, wickets) for innings in match.innings_relationship]
+        return document
+
+    def innings_document(self, innings, wickets):
+        return {
+            'innings_number': innings.innings_number,
+            'batting_team': self.name(innings.teams),
+            'penalty_runs_pre': innings.penalty_runs_pre,
+            'penalty_runs_post': innings.penalty_runs_post,
+            'was_declared': innings.was_declared,
+            'deliveries': [self.delivery_document(delivery, wickets[(innings.innings_number,
+                                                                      delivery.over_number,
+                                                                      delivery.ball_number)])
+                           for delivery in innings.deliveries_relationship]
+        }
+
+    def delivery_document(self, delivery, wickets):
+        document = {column: getattr(delivery, column) for column in DELIVERY_COLUMNS}
+        document.update({
+            'extras_type': EXTRAS_TYPE_CODES.decode(delivery.extras_type),
+            'phase': PHASE_CODES.decode(delivery.phase),
+            'batsman': self.name(delivery.batsman_relationship),
+            'bowler': self.name(delivery.bowler_relationship),
+            'non_striker': self.name(delivery.non_striker_relationship),
+            'wickets': wickets
+        })
+        return document
+
+    @staticmethod
+    def name(instance):
+        return instance.name if instance is not None else None
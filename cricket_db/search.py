@@ -0,0 +1,130 @@
+import bisect
+import difflib
+import re
+import unicodedata
+from collections import defaultdict, namedtuple
+
+from cricket_db.models import Player, Team, Umpire
+
+SearchResult = namedtuple('SearchResult', ['kind', 'id', 'name', 'score'])
+
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.9
+INITIALS_SCORE = 0.6
+FUZZY_SCORE = 0.9
+# similarity a token needs to be a fuzzy match
+FUZZY_CUTOFF = 0.75
+MIN_SCORE = 0.5
+
+
+class NameIndex:
+    """
+    In memory search index over the names of players, teams and umpires. Names are
+    split in accent and case folded tokens, a query token matches a name token exactly,
+    as a prefix, as an initial of cricsheet style names ('virat kohli' finds 'V Kohli')
+    or fuzzily through a trigram index. Initials only match within queries of several
+    tokens, a single first name would match every name with its initial. The score of
+    a name is the mean of the best match of every query token.
+    """
+
+    def __init__(self):
+        self.names = {}
+        self.entries = defaultdict(set)
+        self.tokens = []
+        self.initials = defaultdict(set)
+        self.trigrams = defaultdict(set)
+
+    def __len__(self):
+        return len(self.names)
+
+    @staticmethod
+    def fold(text):
+        text = unicodedata.normalize('NFKD', text)
+        return ''.join(char for char in text if not unicodedata.combining(char)).replace("'", '')
+
+    @staticmethod
+    def tokenize(text):
+        return [token.lower() for token in re.split(r'[^0-9A-Za-z]+', NameIndex.fold(text)) if token]
+
+    @staticmethod
+    def is_initials(token):
+        """ 'V', 'MS', 'AB' """
+        return token.isupper() and len(token) <= 3
+
+    @staticmethod
+    def token_trigrams(token):
+        padded = f'  {token} '
+        return {padded[index:index + 3] for index in range(len(padded) - 2)}
+
+    def add(self, kind, id, name):
+        """ Index a name, adding a name already indexed is a no-op """
+        if (kind, id) in self.names or name is None:
+            return
+        self.names[(kind, id)] = name
+        for token in re.split(r'[^0-9A-Za-z]+', self.fold(name)):
+            if not token:
+                continue
+            folded = token.lower()
+            if folded not in self.entries:
+                bisect.insort(self.tokens, folded)
+                for trigram in self.token_trigrams(folded):
+                    self.trigrams[trigram].add(folded)
+            self.entries[folded].add((kind, id))
+            if self.is_initials(token):
+                for letter in folded:
+                    self.initials[letter].add(folded)
+
+    def add_ids(self, kind, ids):
+        """ Index a mapping of name to id, e.g. as returned by Utils.bulk_get_or_create """
+        for name, id in ids.items():
+            self.add(kind, id, name)
+
+    @classmethod
+    def from_session(cls, session, models=(Player, Team, Umpire)):
+        name_index = cls()
+        for model in models:
+            for id, name in session.query(model.id, model.name):
+                name_index.add(model.__tablename__, id, name)
+        return name_index
+
+    def token_matches(self, query_token, initials=True):
+        """ Scores of the indexed tokens matching query_token, as an initial only when initials is set """
+        matches = {}
+        start = bisect.bisect_left(self.tokens, query_token)
+        for token in self.tokens[start:]:
+            if not token.startswith(query_token):
+                break
+            matches[token] = EXACT_SCORE if token == query_token else PREFIX_SCORE
+        for token in self.initials.get(query_token[0], ()) if initials else ():
+            matches.setdefault(token, INITIALS_SCORE)
+        if len(query_token) >= 3:
+            shared = defaultdict(int)
+            for trigram in self.token_trigrams(query_token):
+                for token in self.trigrams.get(trigram, ()):
+                    shared[token] += 1
+            for token, count in shared.items():
+                if token in matches or count < 2:
+                    continue
+                ratio = difflib.SequenceMatcher(None, query_token, token).ratio()
+                if ratio >= FUZZY_CUTOFF:
+                    matches[token] = FUZZY_SCORE * ratio
+        return matches
+
+    def search(self, query, kinds=None, limit=10):
+        """ The limit best matching names of kinds (table names, all when None), best first """
+        query_tokens = self.tokenize(query)
+        if not query_tokens:
+            return []
+        scores = defaultdict(lambda: [0.0] * len(query_tokens))
+        for position, query_token in enumerate(query_tokens):
+            for token, score in self.token_matches(query_token, initials=len(query_tokens) > 1).items():
+                for key in self.entries[token]:
+                    if kinds is None or key[0] in kinds:
+                        scores[key][position] = max(scores[key][position], score)
+        results = []
+        for (kind, id), token_scores in scores.items():
+            score = sum(token_scores) / len(token_scores)
+            if score >= MIN_SCORE:
+                results.append(SearchResult(kind, id, self.names[(kind, id)], round(score, 3)))
+        results.sort(key=lambda result: (-result.score, len(result.name), result.name))
+        return results[:limit]
@@ -0,0 +1,60 @@
+"""
+Small synthetic cricsheet scoresheets for the tests loading whole files.
+"""
+import os
+
+import yaml
+
+
+def innings(team, batsmen, bowlers, overs=2):
+    """ overs of six balls, a wide on the second ball and a catch on the ninth """
+    deliveries = []
+    striker, non_striker = batsmen[0], batsmen[1]
+    next_batsman = 2
+    for over in range(overs):
+        for ball in range(1, 7):
+            raw = {'batsman': striker, 'bowler': bowlers[over % len(bowlers)], 'non_striker': non_striker,
+                   'runs': {'batsman': 1, 'extras': 0, 'total': 1}}
+            if over == 0 and ball == 2:
+                raw['extras'] = {'wides': 1}
+                raw['runs'] = {'batsman': 0, 'extras': 1, 'total': 1}
+            if over == 1 and ball == 3:
+                raw['wicket'] = {'kind': 'caught', 'player_out': striker, 'fielders': [bowlers[0]]}
+                raw['runs'] = {'batsman': 0, 'extras': 0, 'total': 0}
+                deliveries.append({f'{over}.{ball}': raw})
+                striker = batsmen[next_batsman]
+                next_batsman += 1
+                continue
+            deliveries.append({f'{over}.{ball}': raw})
+            striker, non_striker = non_striker, striker
+    return {'team': team, 'deliveries': deliveries}
+
+
+def scoresheet(match_id, match_type='T20', overs=20, batting_order=('A', 'B')):
+    """ A scoresheet of one innings per team in batting_order, e.g. ('A', 'B', 'B', 'A') for a follow on """
+    players = {team: [f'{team.lower()}{number}' for number in range(1, 5)] for team in ('A', 'B')}
+    info = {'gender': 'male', 'match_type': match_type, 'venue': 'M Chinnaswamy Stadium', 'city': 'Bangalore',
+            'dates': [f'2019-04-{match_id % 28 + 1:02d}'], 'teams': ['A', 'B'],
+            'toss': {'winner': 'A', 'decision': 'bat'}, 'outcome': {'winner': 'A', 'by': {'runs': 1}},
+            'player_of_match': ['a1'], 'umpires': ['U One', 'U Two']}
+    if overs:
+        info['overs'] = overs
+    ordinals = ('1st', '2nd', '3rd', '4th')
+    return {
+        'meta': {'data_version': 0.9, 'created': '2019-05-01', 'revision': 1},
+        'info': info,
+        'innings': [{f'{ordinals[index]} innings': innings(team, players[team],
+                                                           players['B' if team == 'A' else 'A'][:2])}
+                    for index, team in enumerate(batting_order)],
+    }
+
+
+def write_scoresheets(directory, match_ids, **kwargs):
+    """ Write a scoresheet per match id to directory, return the file names """
+    file_names = []
+    for match_id in match_ids:
+        file_name = os.path.join(directory, f'{match_id}.yaml')
+        with open(file_name, 'w') as stream:
+            yaml.safe_dump(scoresheet(match_id, **kwargs), stream)
+        file_names.append(file_name)
+    return file_names
@@ -0,0 +1,98 @@
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+from unittest import mock
+from cricket_db.cli import build_parser, main, DEFAULT_URL
+from cricket_db.test.scoresheets import write_scoresheets
+
+
+class TestBuildParser(unittest.TestCase):
+    def test_defaults(self):
+        with mock.patch.dict(os.environ):
+            os.environ.pop('CRICSHEET_DB_URL', None)
+            args = build_parser().parse_args(['ingest'])
+        self.assertEqual((args.url, args.directory, args.batch_size, args.workers), (DEFAULT_URL, 'data', 100, 1))
+        self.assertFalse(args.incremental or args.resume or args.partitioned or args.quiet)
+        self.assertIsNone(args.quarantine_dir)
+
+    def test_url_from_environment(self):
+        with mock.patch.dict(os.environ, {'CRICSHEET_DB_URL': 'sqlite:///other.db'}):
+            self.assertEqual(build_parser().parse_args(['stats']).url, 'sqlite:///other.db')
+            self.assertEqual(build_parser().parse_args(['stats', '--url', 'sqlite://']).url, 'sqlite://')
+
+    def test_startup_imports(self):
+        # run in a fresh interpreter, the modules of the other tests are imported in this one
+        output = subprocess.check_output([sys.executable, '-c', (
+            'import sys\n'
+            'from cricket_db.cli import build_parser\n'
+            'build_parser()\n'
+            'print(sorted(module for module in ("sqlalchemy", "yaml") if module in sys.modules))')],
+            cwd=os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+        self.assertEqual(output.decode().strip(), '[]')
+
+
+class TestCommands(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.data_directory = os.path.join(self.directory.name, 'data')
+        os.mkdir(self.data_directory)
+        write_scoresheets(self.data_directory, [1000, 1001])
+        write_scoresheets(self.data_directory, [1002], match_type='ODI', overs=50)
+        self.url = f'sqlite:///{self.directory.name}/cricsheet.db'
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def run_command(self, *argv):
+        stdout, stderr = io.StringIO(), io.StringIO()
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            code = main(list(argv) + ['--url', self.url])
+        return code, stdout.getvalue(), stderr.getvalue()
+
+    def ingest(self, *argv):
+        return self.run_command('ingest', self.data_directory, '--quiet', *argv)
+
+    def test_ingest(self):
+        code, stdout, stderr = self.ingest()
+        self.assertEqual(code, 0)
+        self.assertIn('0 scoresheets quarantined, 0 already loaded', stderr)
+        code, stdout, stderr = self.ingest()
+        self.assertEqual(code, 0)
+        self.assertIn('0 scoresheets quarantined, 3 already loaded', stderr)
+
+    def test_ingest_quarantined(self):
+        with open(os.path.join(self.data_directory, '1003.yaml'), 'wb') as stream:
+            stream.write(b'meta: \xff\n')
+        quarantine_directory = os.path.join(self.directory.name, 'quarantine')
+        code, stdout, stderr = self.ingest('--quarantine-dir', quarantine_directory)
+        self.assertEqual(code, 1)
+        self.assertIn('1 scoresheets quarantined', stderr)
+        self.assertEqual(os.listdir(quarantine_directory), ['1003.yaml'])
+
+    def test_stats(self):
+        self.ingest()
+        code, stdout, stderr = self.run_command('stats')
+        self.assertEqual(code, 0)
+        counts = {' '.join(line.split()[:-1]): int(line.split()[-1]) for line in stdout.splitlines()}
+        self.assertEqual(counts['deliveries'], 3 * 2 * 12)
+        self.assertEqual(counts['wickets'], 3 * 2)
+        self.assertEqual((counts['matches T20'], counts['matches ODI']), (2, 1))
+
+    def test_export(self):
+        self.ingest()
+        code, stdout, stderr = self.run_command('export', '--match-type', 'T20')
+        self.assertEqual(code, 0)
+        documents = [json.loads(line) for line in stdout.splitlines()]
+        self.assertEqual([document['id'] for document in documents], [1000, 1001])
+        output = os.path.join(self.directory.name, 'odi.jsonl')
+        self.assertEqual(self.run_command('export', '--match-type', 'ODI', '--output', output)[0], 0)
+        with open(output) as stream:
+            self.assertEqual([json.loads(line)['id'] for line in stream], [1002])
+
+if __name__ == '__main__':
+    unittest.main()
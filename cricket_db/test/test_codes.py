@@ -0,0 +1,27 @@
+import unittest
+from cricket_db.codes import Codes, EXTRAS_TYPE_CODES, DISMISSAL_KIND_CODES
+
+fixtures = ['wides', 'noballs', 'byes', 'legbyes', 'penalty', None]
+
+output = [1, 2, 3, 4, 5, None]
+
+
+class TestCodes(unittest.TestCase):
+    def test_encode(self):
+        for fixture, expected in zip(fixtures, output):
+            self.assertEqual(EXTRAS_TYPE_CODES.encode(fixture), expected)
+
+    def test_decode(self):
+        for fixture, expected in zip(fixtures, output):
+            self.assertEqual(EXTRAS_TYPE_CODES.decode(expected), fixture)
+
+    def test_unknown_name(self):
+        with self.assertRaises(ValueError):
+            DISMISSAL_KIND_CODES.encode('bowled out')
+
+    def test_rows(self):
+        self.assertListEqual(Codes('phase', ('powerplay', 'middle')).rows(),
+                             [{'id': 1, 'name': 'powerplay'}, {'id': 2, 'name': 'middle'}])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import os
+import tempfile
+import unittest
+from decimal import Decimal
+from sqlalchemy import func
+from sqlalchemy.orm import sessionmaker
+from cricket_db.models import Delivery, Wicket
+from cricket_db.columnar import ColumnarBatch
+from cricket_db.engines import DuckDBEngine
+from cricket_db.dump import DumpCricketDB
+from cricket_db.test.scoresheets import write_scoresheets
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+try:
+    import duckdb
+    import duckdb_engine
+except ImportError:
+    duckdb = None
+
+MATCH_IDS = [1000, 1001]
+
+fixtures = [
+    dict(match=1000, match_type=3, season=2019, innings=1, over_number=0, ball_number=1, batsman=1, bowler=2,
+         non_striker=3, runs_batsman=4, was_boundary=True, runs_extras=0, extras_type=None, runs_total=4,
+         has_wicket=False, legal_ball_number=1, cumulative_runs=4, cumulative_wickets=0, phase=1,
+         target=150, required_run_rate=Decimal('7.30')),
+    dict(match=1000, match_type=3, season=2019, innings=1, over_number=0, ball_number=2, batsman=1, bowler=2,
+         non_striker=3, runs_batsman=0, was_boundary=False, runs_extras=1, extras_type=1, runs_total=1,
+         has_wicket=False, legal_ball_number=1, cumulative_runs=5, cumulative_wickets=0, phase=1,
+         target=None, required_run_rate=None),
+]
+
+
+class TestColumnarBatch(unittest.TestCase):
+    def test_len(self):
+        batch = ColumnarBatch(Delivery).extend(fixtures)
+        self.assertEqual(len(batch), 2)
+        self.assertNotIn('id', batch.data)
+
+    @unittest.skipUnless(pyarrow, 'pyarrow is not installed')
+    def test_to_arrow(self):
+        table = ColumnarBatch(Delivery).extend(fixtures).to_arrow()
+        self.assertEqual(table.num_rows, 2)
+        self.assertEqual(table.schema.field('match').type, pyarrow.int64())
+        self.assertEqual(table.schema.field('over_number').type, pyarrow.int16())
+        self.assertEqual(table.schema.field('was_boundary').type, pyarrow.bool_())
+        self.assertEqual(table.schema.field('required_run_rate').type, pyarrow.float64())
+        self.assertEqual(table.column('required_run_rate').to_pylist(), [7.3, None])
+        self.assertEqual(table.column('extras_type').to_pylist(), [None, 1])
+
+
+@unittest.skipUnless(duckdb and pyarrow, 'duckdb, duckdb_engine or pyarrow is not installed')
+class TestDuckDBLoad(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.data_directory = os.path.join(self.directory.name, 'data')
+        os.mkdir(self.data_directory)
+        write_scoresheets(self.data_directory, MATCH_IDS)
+        self.engine = DuckDBEngine(database_name=os.path.join(self.directory.name, 'cricsheet.duckdb'),
+                                   threads=1).create_engine()
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.directory.cleanup()
+
+    def test_load(self):
+        DumpCricketDB(self.engine).dump_data_from_directory(self.data_directory)
+        session = sessionmaker(bind=self.engine)()
+        self.assertEqual(session.query(func.count(Delivery.id)).scalar(), 48)
+        self.assertEqual(session.query(func.count(Wicket.id)).scalar(), 4)
+        self.assertEqual([id for id, in session.query(Delivery.id).order_by(Delivery.id)], list(range(1, 49)))
+        self.assertEqual(session.query(Delivery.runs_total).filter(Delivery.match == 1000, Delivery.innings == 1,
+                                                                   Delivery.over_number == 0,
+                                                                   Delivery.ball_number == 2).scalar(), 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+from cricket_db.cricsheet_xml_reader import CricsheetXMLReader, ScoresheetError
+from cricket_db.parsers.flatten import DeliveryRow
+from cricket_db.test.scoresheets import scoresheet
+
+fixtures = [
+    'meta: [unclosed',
+    'meta:\n  data_version: 0.9\n',
+    'info: {}\nmeta: {}\ninnings: []\n'
+]
+
+# (match type, overs, batting order), {(innings number, target)}
+targets = [
+    (('T20', 20, ('A', 'B')), {(1, None), (2, 12)}),
+    (('Test', None, ('A', 'B')), {(1, None), (2, None)}),
+    (('Test', None, ('A', 'B', 'A', 'B')), {(1, None), (2, None), (3, None), (4, 12)}),
+    (('Test', None, ('A', 'B', 'B', 'A')), {(1, None), (2, None), (3, None), (4, 12)}),
+]
+
+
+class TestCricsheetXMLReader(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.reader = CricsheetXMLReader()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, file_name, content):
+        file_name = os.path.join(self.directory.name, file_name)
+        with open(file_name, 'w') as stream:
+            stream.write(content)
+        return file_name
+
+    def test_invalid_scoresheets(self):
+        for fixture in fixtures:
+            file_name = self.write('947147.yaml', fixture)
+            with self.assertRaises(ScoresheetError) as context:
+                self.reader.get_lst_objects_from_file(file_name)
+            self.assertEqual(context.exception.file_name, file_name)
+
+    def test_unreadable_scoresheets(self):
+        file_name = os.path.join(self.directory.name, '947147.yaml')
+        with open(file_name, 'wb') as stream:
+            stream.write(b'meta: \xff\n')
+        for file_name in (file_name, os.path.join(self.directory.name, '947148.yaml')):
+            with self.assertRaises(ScoresheetError) as context:
+                self.reader.get_lst_objects_from_file(file_name)
+            self.assertTrue(context.exception.reason.startswith('Reading the file failed'))
+
+    def test_targets(self):
+        reader = CricsheetXMLReader(rows=True)
+        for (match_type, overs, batting_order), expected in targets:
+            raw = scoresheet(1000, match_type=match_type, overs=overs, batting_order=batting_order)
+            rows = reader.get_lst_objects_from_raw(1000, raw)
+            self.assertEqual({(row.innings, row.target) for row in rows if isinstance(row, DeliveryRow)}, expected)
+
+    def test_file_names(self):
+        self.write('.DS_Store', '')
+        second = self.write('947148.yaml', '')
+        first = self.write('947147.yaml', '')
+        self.assertListEqual(self.reader.get_file_names(self.directory.name), [first, second])
+
+if __name__ == '__main__':
+    unittest.main()
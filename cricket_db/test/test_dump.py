@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import yaml
+from sqlalchemy import create_engine
+from sqlalchemy.exc import OperationalError
+from cricket_db.models import Base, Match, Delivery, IngestCheckpoint
+from cricket_db.dump import DumpCricketDB, LOADED
+from cricket_db.test.scoresheets import scoresheet, write_scoresheets
+
+MATCH_IDS = [1000, 1001, 1002, 1003]
+
+
+class TestDumpCricketDB(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.data_directory = os.path.join(self.directory.name, 'data')
+        self.quarantine_directory = os.path.join(self.directory.name, 'quarantine')
+        os.mkdir(self.data_directory)
+        self.file_names = write_scoresheets(self.data_directory, MATCH_IDS)
+        self.engine = create_engine(f'sqlite:///{self.directory.name}/cricsheet.db')
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.directory.cleanup()
+
+    def dump(self, engine=None, **kwargs):
+        dump_cricket_db = DumpCricketDB(engine or self.engine, quarantine_dir=self.quarantine_directory)
+        dump_cricket_db.dump_data_from_directory(self.data_directory, **kwargs)
+        return dump_cricket_db
+
+    @staticmethod
+    def row_counts(session):
+        return {table.name: session.query(table).count() for table in Base.metadata.sorted_tables}
+
+    @staticmethod
+    def journal(session):
+        return dict(session.query(IngestCheckpoint.file_name, IngestCheckpoint.status))
+
+    def test_reload_skips_loaded_matches(self):
+        self.dump()
+        dump_cricket_db = self.dump()
+        self.assertEqual(dump_cricket_db.quarantine, [])
+        self.assertEqual(dump_cricket_db.skipped, self.file_names)
+        self.assertEqual(sorted(os.listdir(self.data_directory)), [f'{match_id}.yaml' for match_id in MATCH_IDS])
+        self.assertEqual(dump_cricket_db.session.query(Delivery).count(), 4 * 24)
+
+    def test_quarantine_bad_scoresheets(self):
+        raw = scoresheet(1004)
+        next(iter(raw['innings'][0].values()))['deliveries'][8]['1.3']['wicket']['kind'] = 'unknown kind'
+        with open(os.path.join(self.data_directory, '1004.yaml'), 'w') as stream:
+            yaml.safe_dump(raw, stream)
+        with open(os.path.join(self.data_directory, '1005.yaml'), 'wb') as stream:
+            stream.write(b'meta: \xff\n')
+        dump_cricket_db = self.dump(batch_size=6)
+        reasons = {os.path.basename(file_name): reason for file_name, reason in dump_cricket_db.quarantine}
+        self.assertEqual(sorted(reasons), ['1004.yaml', '1005.yaml'])
+        self.assertIn('unknown kind', reasons['1004.yaml'])
+        self.assertEqual(sorted(os.listdir(self.quarantine_directory)), ['1004.yaml', '1005.yaml'])
+        self.assertEqual(sorted(match_id for match_id, in dump_cricket_db.session.query(Match.id)), MATCH_IDS)
+
+    def test_connection_error_is_raised(self):
+        error = OperationalError('COMMIT', {}, Exception('server closed the connection unexpectedly'))
+        with mock.patch('sqlalchemy.orm.Session.commit', side_effect=error):
+            with self.assertRaises(OperationalError):
+                self.dump()
+        self.assertFalse(os.path.exists(self.quarantine_directory))
+        self.assertEqual(len(os.listdir(self.data_directory)), len(MATCH_IDS))
+
+    def test_resume_after_interruption(self):
+        def interrupt(done, total, batch):
+            if done == 2:
+                raise RuntimeError('interrupted')
+        with self.assertRaises(RuntimeError):
+            self.dump(batch_size=1, progress=interrupt)
+        progress = mock.Mock()
+        dump_cricket_db = self.dump(batch_size=1, resume=True, progress=progress)
+        self.assertEqual([call.args[:2] for call in progress.call_args_list], [(1, 2), (2, 2)])
+        self.assertEqual(dump_cricket_db.skipped, [])
+        clean_engine = create_engine(f'sqlite:///{self.directory.name}/clean.db')
+        clean_dump_cricket_db = self.dump(clean_engine, batch_size=1)
+        self.assertEqual(self.row_counts(dump_cricket_db.session), self.row_counts(clean_dump_cricket_db.session))
+        self.assertEqual(self.journal(dump_cricket_db.session), self.journal(clean_dump_cricket_db.session))
+        clean_engine.dispose()
+
+    def test_loaded_journal_entry_is_kept(self):
+        self.dump()
+        with open(self.file_names[0], 'wb') as stream:
+            stream.write(b'meta: \xff\n')
+        dump_cricket_db = self.dump()
+        self.assertEqual([file_name for file_name, reason in dump_cricket_db.quarantine], [self.file_names[0]])
+        self.assertEqual(self.journal(dump_cricket_db.session),
+                         {f'{match_id}.yaml': LOADED for match_id in MATCH_IDS})
+
+    def test_dump_data_from_file(self):
+        dump_cricket_db = DumpCricketDB(self.engine)
+        for file_name in self.file_names:
+            dump_cricket_db.dump_data_from_file(file_name)
+        clean_engine = create_engine(f'sqlite:///{self.directory.name}/clean.db')
+        clean_dump_cricket_db = self.dump(clean_engine)
+        self.assertEqual(self.row_counts(dump_cricket_db.session), self.row_counts(clean_dump_cricket_db.session))
+        self.assertEqual(self.journal(dump_cricket_db.session), self.journal(clean_dump_cricket_db.session))
+        self.assertIsInstance(dump_cricket_db.session.query(Match.venue).first()[0], int)
+        self.assertIsInstance(dump_cricket_db.session.query(Delivery.batsman).first()[0], int)
+        clean_engine.dispose()
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import os
+import tempfile
+import unittest
+import yaml
+from sqlalchemy import create_engine, select
+from cricket_db.models import Delivery, Wicket, Player, PlayerInnings, PlayerFormRecord
+from cricket_db.codes import MATCH_TYPE_CODES
+from cricket_db.cricsheet_xml_reader import CricsheetXMLReader
+from cricket_db.form import PlayerForm, BATTING, BOWLING
+from cricket_db.dump import DumpCricketDB
+from cricket_db.test.scoresheets import scoresheet, write_scoresheets
+
+player_ids = {'V Kohli': 1, 'RG Sharma': 2, 'JM Anderson': 3}
+match_dates = {1: '2018-08-01'}
+
+fixtures = [
+    Delivery(match=1, match_type='Test', innings=1, over_number=0, ball_number=1, batsman='V Kohli',
+             non_striker='RG Sharma', bowler='JM Anderson', runs_batsman=4, runs_extras=0, extras_type=None),
+    Delivery(match=1, match_type='Test', innings=1, over_number=0, ball_number=2, batsman='V Kohli',
+             non_striker='RG Sharma', bowler='JM Anderson', runs_batsman=0, runs_extras=1, extras_type='wides'),
+    Delivery(match=1, match_type='Test', innings=1, over_number=0, ball_number=3, batsman='V Kohli',
+             non_striker='RG Sharma', bowler='JM Anderson', runs_batsman=0, runs_extras=1, extras_type='legbyes'),
+    Delivery(match=1, match_type='Test', innings=1, over_number=0, ball_number=4, batsman='V Kohli',
+             non_striker='RG Sharma', bowler='JM Anderson', runs_batsman=0, runs_extras=0, extras_type=None),
+    Wicket(match_id=1, match_type='Test', innings_number=1, over_number=0, ball_number=4, kind='lbw',
+           player_out_name='V Kohli'),
+]
+
+output = {
+    (1, 1, BATTING): {'match': 1, 'innings_number': 1, 'start_date': '2018-08-01', 'runs': 4, 'balls': 3,
+             'dismissed': True, 'wickets': 0, 'runs_conceded': 0, 'balls_bowled': 0},
+    (2, 1, BATTING): {'match': 1, 'innings_number': 1, 'start_date': '2018-08-01', 'runs': 0, 'balls': 0,
+             'dismissed': False, 'wickets': 0, 'runs_conceded': 0, 'balls_bowled': 0},
+    (3, 1, BOWLING): {'match': 1, 'innings_number': 1, 'start_date': '2018-08-01', 'runs': 0, 'balls': 0,
+             'dismissed': False, 'wickets': 1, 'runs_conceded': 5, 'balls_bowled': 3},
+}
+
+
+class TestPlayerForm(unittest.TestCase):
+    def test_innings_rows(self):
+        groups = PlayerForm.innings_rows(fixtures, player_ids, match_dates)
+        for key, expected in output.items():
+            self.assertDictEqual(groups[key][(1, 1)], expected)
+        self.assertEqual(len(groups), len(output))
+
+    def test_form_rows(self):
+        rows = [dict(output[(1, 1, BATTING)], match=match, runs=runs, dismissed=dismissed)
+                for match, runs, dismissed in ((1, 10, True), (2, 30, False), (3, 50, True))]
+        form_rows = PlayerForm(windows=(2,)).form_rows(1, 1, BATTING, rows, first=1)
+        self.assertEqual([row['sequence'] for row in form_rows], [2, 3])
+        self.assertEqual([row['runs'] for row in form_rows], [40, 80])
+        self.assertEqual([row['batting_average'] for row in form_rows], [40.0, 80.0])
+        self.assertEqual(form_rows[-1]['innings'], 2)
+
+
+class TestPlayerFormUpdate(unittest.TestCase):
+    # loaded in file name order, the matches of 2019-04-22, 2019-04-26, 2019-04-03 and 2019-04-13
+    MATCH_IDS = [1001, 1005, 1010, 1020]
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.data_directories = []
+        for name in ('batches', 'single'):
+            data_directory = os.path.join(self.directory.name, name)
+            os.mkdir(data_directory)
+            write_scoresheets(data_directory, self.MATCH_IDS)
+            self.data_directories.append(data_directory)
+        self.engines = [create_engine(f'sqlite:///{self.directory.name}/{name}.db') for name in ('batches', 'single')]
+
+    def tearDown(self):
+        for engine in self.engines:
+            engine.dispose()
+        self.directory.cleanup()
+
+    def load(self, index, batch_size):
+        dump_cricket_db = DumpCricketDB(self.engines[index], form_windows=(2, 10))
+        dump_cricket_db.dump_data_from_directory(self.data_directories[index], batch_size=batch_size)
+        return dump_cricket_db
+
+    @staticmethod
+    def table(session, model):
+        return sorted(tuple(row) for row in session.execute(select(*model.__table__.columns)))
+
+    def assert_same_tables(self, session, other_session):
+        for model in (PlayerInnings, PlayerFormRecord):
+            self.assertEqual(self.table(session, model), self.table(other_session, model))
+
+    def test_batches_out_of_date_order(self):
+        batches = self.load(0, batch_size=1)
+        single = self.load(1, batch_size=len(self.MATCH_IDS))
+        self.assert_same_tables(batches.session, single.session)
+        a1 = batches.dimension_ids[Player]['a1']
+        dates = [row.start_date for row in PlayerForm.series(batches.session, a1, MATCH_TYPE_CODES.encode('T20'), 10)]
+        self.assertEqual(dates, ['2019-04-03', '2019-04-13', '2019-04-22', '2019-04-26'])
+        # a1 faces 5 balls and bowls the first over, a wide and 5 balls, of every match, each
+        # series counts the 4 innings of its discipline
+        batting = PlayerForm.latest(batches.session, a1, MATCH_TYPE_CODES.encode('T20'), 10)
+        bowling = PlayerForm.latest(batches.session, a1, MATCH_TYPE_CODES.encode('T20'), 10, discipline='bowling')
+        self.assertEqual((batting.innings, batting.balls, batting.balls_bowled), (4, 4 * 5, 0))
+        self.assertEqual((bowling.innings, bowling.balls, bowling.balls_bowled), (4, 0, 4 * 5))
+
+    def test_reloaded_innings_are_replaced(self):
+        batches = self.load(0, batch_size=2)
+        raw = scoresheet(1010)
+        raw['innings'][0]['1st innings']['deliveries'][0]['0.1']['runs'] = {'batsman': 4, 'extras': 0, 'total': 4}
+        for data_directory in self.data_directories:
+            with open(os.path.join(data_directory, '1010.yaml'), 'w') as stream:
+                yaml.safe_dump(raw, stream)
+        objects = CricsheetXMLReader(rows=True).get_lst_objects_from_file(
+            os.path.join(self.data_directories[0], '1010.yaml'))
+        batches.player_form.update(batches.session, objects, batches.dimension_ids[Player])
+        batches.session.commit()
+        single = self.load(1, batch_size=len(self.MATCH_IDS))
+        self.assert_same_tables(batches.session, single.session)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import os
+import tempfile
+import unittest
+import yaml
+from sqlalchemy import create_engine
+from cricket_db.models import Delivery, Wicket
+from cricket_db.codes import MATCH_TYPE_CODES
+from cricket_db.head_to_head import HeadToHead, Matchup
+from cricket_db.partitioning import PostgresPartitions
+from cricket_db.dump import DumpCricketDB
+from cricket_db.test.scoresheets import scoresheet, write_scoresheets
+
+player_ids = {'V Kohli': 1, 'RG Sharma': 2, 'JM Anderson': 3, 'SCJ Broad': 4}
+
+fixtures = [
+    Delivery(match=1, match_type='Test', innings=1, over_number=0, ball_number=1, batsman='V Kohli',
+             bowler='JM Anderson', runs_batsman=4, extras_type=None),
+    Delivery(match=1, match_type='Test', innings=1, over_number=0, ball_number=2, batsman='V Kohli',
+             bowler='JM Anderson', runs_batsman=0, extras_type='wides'),
+    Delivery(match=1, match_type='Test', innings=1, over_number=0, ball_number=3, batsman='V Kohli',
+             bowler='JM Anderson', runs_batsman=0, extras_type=None),
+    Delivery(match=1, match_type='Test', innings=1, over_number=1, ball_number=1, batsman='RG Sharma',
+             bowler='SCJ Broad', runs_batsman=6, extras_type=None),
+    Delivery(match=1, match_type='Test', innings=1, over_number=1, ball_number=2, batsman='RG Sharma',
+             bowler='SCJ Broad', runs_batsman=1, extras_type=None),
+    Delivery(match=2, match_type='ODI', innings=1, over_number=0, ball_number=1, batsman='V Kohli',
+             bowler='JM Anderson', runs_batsman=2, extras_type=None),
+    Wicket(match_id=1, innings_number=1, over_number=0, ball_number=3, kind='caught', player_out_name='V Kohli'),
+    Wicket(match_id=1, innings_number=1, over_number=1, ball_number=2, kind='run out', player_out_name='RG Sharma'),
+]
+
+output = {
+    (1, 3, 1): Matchup(1, 3, 1, 4, 2, 1),
+    (1, 3, 2): Matchup(1, 3, 2, 2, 1, 0),
+    (1, 3, None): Matchup(1, 3, None, 6, 3, 1),
+    (2, 4, None): Matchup(2, 4, None, 7, 2, 0),
+    (2, 3, None): Matchup(2, 3, None, 0, 0, 0),
+}
+
+
+class TestHeadToHead(unittest.TestCase):
+    def setUp(self):
+        self.head_to_head = HeadToHead.from_objects(fixtures, player_ids)
+
+    def test_get(self):
+        for key, expected in output.items():
+            self.assertEqual(self.head_to_head.get(*key), expected)
+
+    def test_top_matchups(self):
+        self.assertEqual(self.head_to_head.top_matchups(3, as_batsman=False), [output[(1, 3, None)]])
+        self.assertEqual(self.head_to_head.top_matchups(1, match_type=2), [output[(1, 3, 2)]])
+
+    def test_rows(self):
+        self.assertEqual(len(self.head_to_head), 3)
+        self.assertEqual(len(self.head_to_head.rows()), 3)
+
+
+class SQLitePartitions(PostgresPartitions):
+    """ Partitions emptied with a DELETE, to reload partitions of a SQLite database """
+
+    def truncate_partition(self, session, match_type, season):
+        for model in self.MODELS:
+            session.query(model).filter(model.match_type == match_type, model.season == season).delete()
+
+
+class TestHeadToHeadTable(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        write_scoresheets(self.directory.name, [1000, 1001, 1002])
+        write_scoresheets(self.directory.name, [1003], match_type='ODI', overs=50)
+        self.engine = create_engine(f'sqlite:///{self.directory.name}/cricsheet.db')
+        self.dump_cricket_db = DumpCricketDB(self.engine)
+        self.dump_cricket_db.dump_data_from_directory(self.directory.name, batch_size=2)
+        self.session = self.dump_cricket_db.session
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.directory.cleanup()
+
+    def totals(self, match_type):
+        records = [record for (batsman, bowler, code), record in HeadToHead.load(self.session).records.items()
+                   if code == MATCH_TYPE_CODES.encode(match_type)]
+        return [sum(record[index] for record in records) for index in range(3)]
+
+    def test_upsert_across_batches(self):
+        self.assertEqual(HeadToHead.load(self.session).records, HeadToHead.from_deliveries(self.session).records)
+        # per innings 10 runs, 11 balls faced without the wide and the catch credited to the bowler
+        self.assertEqual(self.totals('T20'), [3 * 2 * 10, 3 * 2 * 11, 3 * 2])
+        self.assertEqual(self.totals('ODI'), [2 * 10, 2 * 11, 2])
+
+    def test_rebuild(self):
+        loaded = HeadToHead.load(self.session).records
+        HeadToHead.rebuild(self.session)
+        self.session.commit()
+        self.assertEqual(HeadToHead.load(self.session).records, loaded)
+
+    def test_reload_partition(self):
+        raw = scoresheet(1001)
+        raw['innings'][0]['1st innings']['deliveries'][0]['0.1']['runs'] = {'batsman': 4, 'extras': 0, 'total': 4}
+        with open(os.path.join(self.directory.name, '1001.yaml'), 'w') as stream:
+            yaml.safe_dump(raw, stream)
+        self.dump_cricket_db.partitions = SQLitePartitions(self.engine)
+        self.dump_cricket_db.reload_partition('T20', 2019, self.directory.name)
+        self.assertEqual(HeadToHead.load(self.session).records, HeadToHead.from_deliveries(self.session).records)
+        self.assertEqual(self.totals('T20'), [3 * 2 * 10 + 3, 3 * 2 * 11, 3 * 2])
+        self.assertEqual(self.totals('ODI'), [2 * 10, 2 * 11, 2])
+
+if __name__ == '__main__':
+    unittest.main()
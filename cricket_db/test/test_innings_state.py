@@ -0,0 +1,53 @@
+import unittest
+from cricket_db.innings_state import InningsStateTracker
+
+MAX_OVERS = 20
+TARGET = 10
+
+fixtures = [
+    ('0', 1, None, []),
+    ('0', 1, 'wides', []),
+    ('5', 4, None, []),
+    ('6', 0, None, ['bowled']),
+    ('16', 0, None, ['retired hurt']),
+    ('19', 6, None, [])
+]
+
+output = [
+    {'legal_ball_number': 1, 'cumulative_runs': 1, 'cumulative_wickets': 0, 'phase': 'powerplay',
+     'target': 10, 'required_run_rate': 0.45},
+    {'legal_ball_number': 1, 'cumulative_runs': 2, 'cumulative_wickets': 0, 'phase': 'powerplay',
+     'target': 10, 'required_run_rate': 0.4},
+    {'legal_ball_number': 2, 'cumulative_runs': 6, 'cumulative_wickets': 0, 'phase': 'powerplay',
+     'target': 10, 'required_run_rate': 0.2},
+    {'legal_ball_number': 3, 'cumulative_runs': 6, 'cumulative_wickets': 1, 'phase': 'middle',
+     'target': 10, 'required_run_rate': 0.21},
+    {'legal_ball_number': 4, 'cumulative_runs': 6, 'cumulative_wickets': 1, 'phase': 'death',
+     'target': 10, 'required_run_rate': 0.21},
+    {'legal_ball_number': 5, 'cumulative_runs': 12, 'cumulative_wickets': 1, 'phase': 'death',
+     'target': 10, 'required_run_rate': 0}
+]
+
+
+class TestInningsStateTracker(unittest.TestCase):
+    def setUp(self):
+        self.innings_state = InningsStateTracker(MAX_OVERS, TARGET)
+
+    def test_innings_state_tracker(self):
+        for fixture, expected in zip(fixtures, output):
+            self.assertDictEqual(self.innings_state.update(*fixture), expected)
+
+    def test_unlimited_overs(self):
+        innings_state = InningsStateTracker()
+        state = innings_state.update('80', 4)
+        self.assertIsNone(state['phase'])
+        self.assertIsNone(state['required_run_rate'])
+
+    def test_odi_phases(self):
+        innings_state = InningsStateTracker(50)
+        self.assertEqual(innings_state.phase(9), 'powerplay')
+        self.assertEqual(innings_state.phase(10), 'middle')
+        self.assertEqual(innings_state.phase(40), 'death')
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,50 @@
+import unittest
+from sqlalchemy import create_engine, MetaData, Table, Column, Integer, String, select, text
+from cricket_db.models import City, Venue, VenueAlias
+from cricket_db.migrations import CompactSchemaMigration
+
+fixtures = [
+    (1, 'M.Chinnaswamy Stadium', 'Bangalore'),
+    (2, 'M Chinnaswamy Stadium, Bangalore', 'Bangalore'),
+    (3, 'Eden Gardens', None),
+    (4, None, None),
+]
+
+output = {1: (2, 1), 2: (2, 1), 3: (1, None), 4: (None, None)}
+
+innings_numbers = {'1st innings': 1, '2nd innings': 2, '10th innings': 10}
+
+
+class TestCompactSchemaMigration(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite://')
+        self.migration = CompactSchemaMigration(self.engine)
+
+    def test_match_dimensions(self):
+        matches = Table('matches', MetaData(), Column('id', Integer, primary_key=True),
+                        Column('venue', String), Column('city', String))
+        with self.engine.begin() as connection:
+            matches.create(connection)
+            for model in self.migration.DIMENSION_MODELS:
+                model.__table__.create(connection)
+            connection.execute(matches.insert(), [{'id': id, 'venue': venue, 'city': city}
+                                                  for id, venue, city in fixtures])
+            self.migration.migrate_match_dimensions(connection)
+            self.assertFalse(self.migration.has_string_column(connection, 'matches', 'venue'))
+            rows = connection.execute(text('SELECT id, venue, city FROM matches'))
+            self.assertEqual({id: (venue, city) for id, venue, city in rows}, output)
+            self.assertEqual(dict(connection.execute(select(Venue.name, Venue.id)).all()),
+                             {'Eden Gardens': 1, 'M Chinnaswamy Stadium': 2})
+            self.assertEqual(dict(connection.execute(select(City.name, City.id)).all()), {'Bangalore': 1})
+            self.assertEqual(len(list(connection.execute(select(VenueAlias.name)))), 3)
+
+    def test_innings_number(self):
+        innings = Table('innings_legacy', MetaData(), Column('innings_number', String))
+        with self.engine.begin() as connection:
+            innings.create(connection)
+            connection.execute(innings.insert(), [{'innings_number': name} for name in innings_numbers])
+            number = self.migration.innings_number(connection, innings.c.innings_number)
+            self.assertEqual(dict(connection.execute(select(innings.c.innings_number, number)).all()), innings_numbers)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -18,7 +18,7 @@ fixtures = [
         'bowler': 'LJ Fletcher',
         'non_striker': 'AN Petersen',
         'runs': {'batsman': 0, 'extras': 0, 'total': 0},
-        'wickets': {}
+        'wicket': {'kind': 'bowled', 'player_out': 'MJ Guptill'}
     }
 ]
 
@@ -0,0 +1,67 @@
+import unittest
+from cricket_db.innings_state import InningsStateTracker
+from cricket_db.parsers.delivery import DeliveryParser
+from cricket_db.parsers.wicket import WicketParser
+from cricket_db.parsers.flatten import InningsFlattener, DeliveryRow, WicketRow
+
+MATCH_ID = 947147
+INNINGS_NUMBER = 2
+PARTITION = {'match_type': 'T20', 'season': 2015}
+
+fixtures = [
+    {0.1: {'batsman': 'MJ Guptill', 'bowler': 'LJ Fletcher', 'non_striker': 'AN Petersen',
+           'runs': {'batsman': 4, 'extras': 0, 'total': 4}}},
+    {0.2: {'batsman': 'MJ Guptill', 'bowler': 'LJ Fletcher', 'non_striker': 'AN Petersen',
+           'extras': {'noballs': 1}, 'runs': {'batsman': 4, 'extras': 1, 'total': 5, 'non_boundary': True}}},
+    {0.3: {'batsman': 'MJ Guptill', 'bowler': 'LJ Fletcher', 'non_striker': 'AN Petersen',
+           'runs': {'batsman': 0, 'extras': 0, 'total': 0},
+           'wicket': {'kind': 'caught', 'player_out': 'MJ Guptill', 'fielders': ['SR Watson', 'sub']}}},
+    {0.4: {'batsman': 'KS Williamson', 'bowler': 'LJ Fletcher', 'non_striker': 'AN Petersen',
+           'runs': {'batsman': 1, 'extras': 0, 'total': 1},
+           'wicket': [{'kind': 'retired hurt', 'player_out': 'AN Petersen'},
+                      {'kind': 'run out', 'player_out': 'KS Williamson', 'fielders': 'DA Warner'}]}},
+]
+
+
+def parsed(deliveries, innings_state):
+    """ The rows DeliveryParser, WicketParser and InningsStateTracker.update produce """
+    rows = []
+    for delivery in deliveries:
+        key = next(iter(delivery))
+        over_number, ball_number = int(str(key).split('.')[0]), int(str(key).split('.')[1])
+        raw = delivery[key]
+        raw_wickets = raw.get('wicket', [])
+        raw_wickets = raw_wickets if isinstance(raw_wickets, list) else [raw_wickets]
+        values = dict.fromkeys(DeliveryRow._fields)
+        values.update(DeliveryParser(MATCH_ID, INNINGS_NUMBER, over_number, ball_number).parse(raw))
+        values.update(innings_state.update(over_number, values['runs_total'], values['extras_type'],
+                                           [wicket['kind'] for wicket in raw_wickets]))
+        values.update(PARTITION)
+        rows.append(DeliveryRow(**values))
+        for wicket in raw_wickets:
+            values = dict.fromkeys(WicketRow._fields)
+            values.update(WicketParser(MATCH_ID, INNINGS_NUMBER, over_number, ball_number).parse(wicket))
+            values.update(PARTITION)
+            rows.append(WicketRow(**values))
+    return rows
+
+
+class TestInningsFlattener(unittest.TestCase):
+    def setUp(self):
+        self.flattener = InningsFlattener(MATCH_ID, INNINGS_NUMBER, PARTITION['match_type'], PARTITION['season'])
+
+    def test_same_rows_as_parsers(self):
+        rows = self.flattener.parse(fixtures, InningsStateTracker(20, target=150))
+        self.assertEqual(rows, parsed(fixtures, InningsStateTracker(20, target=150)))
+
+    def test_rows(self):
+        rows = self.flattener.parse(fixtures, InningsStateTracker(20, target=150))
+        self.assertEqual([type(row) for row in rows],
+                         [DeliveryRow, DeliveryRow, DeliveryRow, WicketRow, DeliveryRow, WicketRow, WicketRow])
+        self.assertEqual((rows[1].was_boundary, rows[1].extras_type, rows[1].legal_ball_number), (False, 'noballs', 1))
+        self.assertEqual((rows[4].cumulative_runs, rows[4].cumulative_wickets), (10, 2))
+        self.assertEqual([row.has_wicket for row in rows if type(row) is DeliveryRow], [False, False, True, True])
+        self.assertEqual((rows[3].fielder_name, rows[6].fielder_name), ('SR Watson', 'DA Warner'))
+
+if __name__ == '__main__':
+    unittest.main()
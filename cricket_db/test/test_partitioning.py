@@ -0,0 +1,84 @@
+import os
+import tempfile
+import unittest
+from sqlalchemy import create_engine, create_mock_engine, inspect
+from cricket_db.models import Delivery, Wicket
+from cricket_db.codes import MATCH_TYPE_CODES
+from cricket_db.partitioning import PostgresPartitions
+from cricket_db.dump import DumpCricketDB
+from cricket_db.test.scoresheets import write_scoresheets
+
+T20 = MATCH_TYPE_CODES.encode('T20')
+
+output = [
+    (('deliveries', T20), 'deliveries_t20'),
+    (('deliveries', T20, 2020), 'deliveries_t20_2020'),
+    (('wickets', MATCH_TYPE_CODES.encode('IT20'), 2008), 'wickets_it20_2008'),
+]
+
+
+class TestPostgresPartitions(unittest.TestCase):
+    def setUp(self):
+        self.statements = []
+        self.engine = create_mock_engine('postgresql://', self.execute)
+        self.partitions = PostgresPartitions(self.engine)
+
+    def execute(self, statement, *multiparams, **params):
+        self.statements.append(' '.join(str(statement.compile(dialect=self.engine.dialect)).split()))
+
+    def test_partition_name(self):
+        for arguments, expected in output:
+            self.assertEqual(PostgresPartitions.partition_name(*arguments), expected)
+
+    def test_create_table(self):
+        self.partitions.create_table(self.engine, Delivery.__table__)
+        self.assertEqual(self.statements[0], 'CREATE SEQUENCE deliveries_id_seq')
+        create_table = self.statements[1]
+        self.assertTrue(create_table.startswith('CREATE TABLE deliveries (id INTEGER NOT NULL, match INTEGER NOT NULL'))
+        self.assertIn('PRIMARY KEY (id, match_type, season)', create_table)
+        self.assertIn('CONSTRAINT _delivery_uc UNIQUE (match, innings, over_number, ball_number, match_type, season)',
+                      create_table)
+        self.assertTrue(create_table.endswith(') PARTITION BY LIST (match_type)'))
+        self.assertIn('ALTER TABLE deliveries ADD FOREIGN KEY(innings) REFERENCES innings (id)', self.statements)
+        self.assertIn('CREATE INDEX _delivery_match_type_season_idx ON deliveries (match_type, season)',
+                      self.statements)
+
+    def test_ensure_partitions(self):
+        self.partitions.ensure_partitions(self.engine, [(T20, 2020), (T20, 2019), (T20, 2020)])
+        self.assertEqual(self.statements[1], 'CREATE TABLE IF NOT EXISTS deliveries_t20 PARTITION OF deliveries '
+                                             'FOR VALUES IN (3) PARTITION BY RANGE (season)')
+        self.assertEqual(self.statements[2], 'CREATE TABLE IF NOT EXISTS deliveries_t20_2019 PARTITION OF '
+                                             'deliveries_t20 FOR VALUES FROM (2019) TO (2020)')
+        self.assertEqual(len(self.statements), 1 + 3 * len(PostgresPartitions.MODELS))
+        self.assertTrue(self.statements[-1].startswith('CREATE TABLE IF NOT EXISTS wickets_t20_2020'))
+
+    def test_not_postgres(self):
+        engine = create_engine('sqlite://')
+        with self.assertRaises(ValueError) as context:
+            DumpCricketDB(engine, partitioned=True)
+        self.assertIn('needs Postgres', str(context.exception))
+        self.assertEqual(inspect(engine).get_table_names(), [])
+
+
+class TestReloadPartition(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.file_names = write_scoresheets(self.directory.name, [1000, 1001])
+        engine = create_engine('sqlite://')
+        self.dump_cricket_db = DumpCricketDB(engine)
+        self.dump_cricket_db.dump_data_from_directory(self.directory.name)
+        self.dump_cricket_db.partitions = PostgresPartitions(engine)
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_missing_scoresheet(self):
+        os.remove(self.file_names[1])
+        with self.assertRaises(FileNotFoundError) as context:
+            self.dump_cricket_db.reload_partition('T20', 2019, self.directory.name)
+        self.assertIn(self.file_names[1], str(context.exception))
+        self.assertNotIn(self.file_names[0], str(context.exception))
+        self.assertEqual(self.dump_cricket_db.session.query(Wicket).count(), 4)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+import tempfile
+import unittest
+from unittest import mock
+from sqlalchemy import create_engine, select
+from cricket_db.models import Partnership
+from cricket_db.partnerships import PartnershipTracker, Partnerships
+from cricket_db.dump import DumpCricketDB
+from cricket_db.test.scoresheets import write_scoresheets
+
+# (batsman, non_striker, runs_batsman, runs_total, extras_type, over, ball, dismissals)
+fixtures = [
+    ('A', 'B', 4, 4, None, 0, 1, []),
+    ('A', 'B', 0, 1, 'wides', 0, 2, []),
+    ('A', 'B', 1, 1, None, 0, 3, []),
+    ('B', 'A', 0, 0, None, 0, 4, [('bowled', 'B')]),
+    ('C', 'A', 2, 2, None, 0, 5, []),
+    ('C', 'A', 0, 0, None, 0, 6, [('retired hurt', 'C')]),
+    ('A', 'D', 6, 6, None, 1, 1, []),
+]
+
+output = [
+    {'partnership_number': 1, 'wicket_number': 1, 'batsman_first': 'A', 'batsman_second': 'B', 'runs': 6,
+     'balls': 3, 'batsman_first_runs': 5, 'batsman_second_runs': 0, 'start_score': 0, 'end_score': 6,
+     'end_over': 0, 'end_ball': 4, 'ended_by': 'bowled', 'player_out': 'B'},
+    {'partnership_number': 2, 'wicket_number': 2, 'batsman_first': 'A', 'batsman_second': 'C', 'runs': 2,
+     'balls': 2, 'batsman_first_runs': 0, 'batsman_second_runs': 2, 'start_score': 6, 'end_score': 8,
+     'end_over': 0, 'end_ball': 6, 'ended_by': 'retired hurt', 'player_out': 'C'},
+    {'partnership_number': 3, 'wicket_number': 2, 'batsman_first': 'A', 'batsman_second': 'D', 'runs': 6,
+     'balls': 1, 'batsman_first_runs': 6, 'batsman_second_runs': 0, 'start_score': 8, 'end_score': 14,
+     'end_over': 1, 'end_ball': 1, 'ended_by': None, 'player_out': None},
+]
+
+
+class TestPartnershipTracker(unittest.TestCase):
+    def setUp(self):
+        self.tracker = PartnershipTracker()
+
+    def test_partnerships(self):
+        for *delivery, dismissals in fixtures:
+            self.tracker.delivery(*delivery)
+            for kind, player_out in dismissals:
+                self.tracker.wicket(kind, player_out)
+        self.assertEqual(len(self.tracker.partnerships), len(output))
+        for partnership, expected in zip(self.tracker.partnerships, output):
+            self.assertDictEqual(partnership, expected)
+
+
+class TestRebuild(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        write_scoresheets(self.directory.name, [1000, 1001, 1002])
+        self.engine = create_engine(f'sqlite:///{self.directory.name}/cricsheet.db')
+        self.dump_cricket_db = DumpCricketDB(self.engine)
+        self.dump_cricket_db.dump_data_from_directory(self.directory.name)
+
+    def tearDown(self):
+        self.engine.dispose()
+        self.directory.cleanup()
+
+    def partnerships(self):
+        columns = [column for column in Partnership.__table__.columns if column.name != 'id']
+        with self.engine.connect() as connection:
+            return sorted(connection.execute(select(*columns)).all())
+
+    def test_rebuild_in_chunks(self):
+        loaded = self.partnerships()
+        self.assertEqual(len(loaded), 3 * 2 * 2)
+        # chunks ending in the middle of innings, partnerships written before the last chunk
+        with mock.patch('cricket_db.partnerships.REBUILD_CHUNK_SIZE', 5):
+            Partnerships.rebuild(self.dump_cricket_db.session)
+        self.assertEqual(self.partnerships(), loaded)
+
+if __name__ == '__main__':
+    unittest.main()
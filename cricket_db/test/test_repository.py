@@ -0,0 +1,47 @@
+import tempfile
+import unittest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+from cricket_db.dump import DumpCricketDB
+from cricket_db.repository import MatchRepository
+from cricket_db.test.scoresheets import write_scoresheets
+
+MATCH_IDS = [1000, 1001, 1002, 1003]
+# matches with their names, innings, deliveries with their players and wickets
+QUERIES = 4
+
+
+class TestMatchRepository(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        write_scoresheets(self.directory.name, MATCH_IDS)
+        engine = create_engine('sqlite://')
+        DumpCricketDB(engine).dump_data_from_directory(self.directory.name)
+        self.statements = []
+        event.listen(engine, 'before_cursor_execute',
+                     lambda connection, cursor, statement, *args: self.statements.append(statement))
+        self.repository = MatchRepository(sessionmaker(bind=engine)())
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_constant_queries(self):
+        for match_ids in (MATCH_IDS[:1], MATCH_IDS):
+            self.statements.clear()
+            documents = self.repository.get_match_documents(match_ids)
+            self.assertEqual([document['id'] for document in documents], match_ids)
+            self.assertEqual(len(self.statements), QUERIES)
+
+    def test_document(self):
+        document = self.repository.get_match_documents(MATCH_IDS[:1])[0]
+        self.assertEqual((document['venue'], document['team_home'], document['umpire_first']),
+                         ('M Chinnaswamy Stadium', 'A', 'U One'))
+        self.assertEqual([innings['batting_team'] for innings in document['innings']], ['A', 'B'])
+        deliveries = document['innings'][0]['deliveries']
+        self.assertEqual(len(deliveries), 12)
+        self.assertEqual(deliveries[0]['batsman'], 'a1')
+        self.assertEqual(deliveries[8]['wickets'], [{'kind': 'caught', 'player_out': 'a1', 'fielder': 'b1'}])
+        self.assertEqual([index for index, delivery in enumerate(deliveries) if delivery['has_wicket']], [8])
+
+if __name__ == '__main__':
+    unittest.main()
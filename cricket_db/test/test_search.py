@@ -0,0 +1,53 @@
+import unittest
+from cricket_db.search import NameIndex
+
+fixtures = [
+    ('players', 1, 'V Kohli'),
+    ('players', 2, 'MS Dhoni'),
+    ('players', 3, 'AB de Villiers'),
+    ('players', 4, 'V Sehwag'),
+    ('teams', 1, 'India'),
+    ('umpires', 1, 'Aleem Dar'),
+]
+
+output = [
+    ('kohli', 'V Kohli'),
+    ('Koh', 'V Kohli'),
+    ('virat kohli', 'V Kohli'),
+    ('mahendra singh dhoni', 'MS Dhoni'),
+    ('de villers', 'AB de Villiers'),
+    ('sehwg', 'V Sehwag'),
+    ('ind', 'India'),
+    ('aleem', 'Aleem Dar'),
+]
+
+
+class TestNameIndex(unittest.TestCase):
+    def setUp(self):
+        self.name_index = NameIndex()
+        for fixture in fixtures:
+            self.name_index.add(*fixture)
+
+    def test_search(self):
+        for query, expected in output:
+            self.assertEqual(self.name_index.search(query)[0].name, expected)
+
+    def test_results(self):
+        self.assertEqual(self.name_index.search('virat'), [])
+        self.assertEqual([result.name for result in self.name_index.search('virat kohli')], ['V Kohli'])
+        self.assertEqual([result.name for result in self.name_index.search('v')],
+                         ['V Kohli', 'V Sehwag', 'AB de Villiers'])
+        self.assertEqual([(result.name, result.score) for result in self.name_index.search('virender sehwag')],
+                         [('V Sehwag', 0.8)])
+
+    def test_kinds(self):
+        self.assertEqual(self.name_index.search('dar', kinds=('players',)), [])
+        self.assertEqual(self.name_index.search('dar', kinds=('umpires',))[0].id, 1)
+
+    def test_add_ids(self):
+        self.name_index.add_ids('players', {'V Kohli': 1, 'JJ Bumrah': 5})
+        self.assertEqual(len(self.name_index), 7)
+        self.assertEqual(self.name_index.search('bumrah')[0].id, 5)
+
+if __name__ == '__main__':
+    unittest.main()
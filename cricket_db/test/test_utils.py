@@ -0,0 +1,34 @@
+import unittest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from cricket_db.models import Base, Player
+from cricket_db.utils import Utils
+
+fixtures = ['V Kohli', None, 'JJ Bumrah', 'V Kohli', 'RG Sharma']
+
+
+class TestBulkGetOrCreate(unittest.TestCase):
+    def setUp(self):
+        engine = create_engine('sqlite://')
+        Base.metadata.create_all(engine, tables=[Player.__table__])
+        self.session = sessionmaker(bind=engine)()
+        self.session.add(Player(id=7, name='V Kohli'))
+        self.session.commit()
+
+    def test_new_and_existing_names(self):
+        ids = Utils.bulk_get_or_create(self.session, Player, fixtures)
+        self.assertEqual(set(ids), {'V Kohli', 'JJ Bumrah', 'RG Sharma'})
+        self.assertEqual(ids['V Kohli'], 7)
+        self.assertEqual(dict(self.session.query(Player.name, Player.id)), ids)
+        self.assertEqual(Utils.bulk_get_or_create(self.session, Player, ['RG Sharma']), {'RG Sharma': ids['RG Sharma']})
+
+    def test_no_names(self):
+        self.assertEqual(Utils.bulk_get_or_create(self.session, Player, [None]), {})
+
+    def test_not_committed(self):
+        Utils.bulk_get_or_create(self.session, Player, fixtures)
+        self.session.rollback()
+        self.assertEqual(dict(self.session.query(Player.name, Player.id)), {'V Kohli': 7})
+
+if __name__ == '__main__':
+    unittest.main()
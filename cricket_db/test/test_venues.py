@@ -0,0 +1,29 @@
+import unittest
+from cricket_db.venues import VenueAliases
+
+fixtures = [
+    ('Wankhede Stadium', 'Mumbai'),
+    ('Wankhede Stadium, Mumbai', 'Mumbai'),
+    ('M.Chinnaswamy Stadium', 'Bangalore'),
+    ('M Chinnaswamy Stadium, Bangalore', 'Bangalore'),
+    ('Sharjah Cricket Stadium', None),
+    ('Eden Gardens,  Kolkata', 'Kolkata')
+]
+
+output = [
+    'Wankhede Stadium',
+    'Wankhede Stadium',
+    'M Chinnaswamy Stadium',
+    'M Chinnaswamy Stadium',
+    'Sharjah Cricket Stadium',
+    'Eden Gardens'
+]
+
+
+class TestVenueAliases(unittest.TestCase):
+    def test_normalize(self):
+        for fixture, expected in zip(fixtures, output):
+            self.assertEqual(VenueAliases.normalize(*fixture), expected)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,3 +1,4 @@
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.sql import ClauseElement
 
 
@@ -15,3 +16,31 @@ class Utils:
             session.add(instance)
             session.commit()
             return instance, True
+
+    @staticmethod
+    def copy_object(obj):
+        """ Transient copy of a model instance with the same column values """
+        return type(obj)(**{column.key: getattr(obj, column.key) for column in obj.__table__.columns})
+
+    @staticmethod
+    def insert(session, model):
+        """ Dialect specific insert supporting on conflict clauses """
+        if session.get_bind().dialect.name == 'sqlite':
+            return sqlite.insert(model)
+        return postgresql.insert(model)
+
+    @staticmethod
+    def bulk_get_or_create(session, model, names, key='name'):
+        """
+        Insert the missing names of a dimension table in one statement, skipping names
+        inserted concurrently by other writers, and return a mapping of name to id.
+        Nothing is committed, the rows become visible with the caller's transaction.
+        """
+        names = sorted({name for name in names if name is not None})
+        if not names:
+            return {}
+        statement = Utils.insert(session, model).values([{key: name} for name in names]). \
+            on_conflict_do_nothing(index_elements=[key])
+        session.execute(statement)
+        column = getattr(model, key)
+        return dict(session.query(column, model.id).filter(column.in_(names)))
@@ -0,0 +1,42 @@
+import re
+
+from cricket_db.models import Venue, VenueAlias
+from cricket_db.utils import Utils
+
+WHITESPACE = re.compile(r'\s+')
+
+
+class VenueAliases:
+    """
+    Resolve the venue names found in scoresheets to venue ids. Cricsheet spells some
+    grounds in several ways ("M.Chinnaswamy Stadium", "M Chinnaswamy Stadium, Bangalore"),
+    every spelling is recorded in venue_aliases against the venue of its normalised name.
+    Rows can be added to venue_aliases by hand to merge variants normalisation misses.
+    """
+
+    @staticmethod
+    def normalize(name, city=None):
+        name = WHITESPACE.sub(' ', name.replace('.', ' ')).strip()
+        if city and name.endswith(', ' + city):
+            name = name[:-len(', ' + city)]
+        return name
+
+    @staticmethod
+    def bulk_get_or_create(session, venues):
+        """ Map every venue name of venues, an iterable of (name, city), to a venue id """
+        cities = {name: city for name, city in venues if name is not None}
+        if not cities:
+            return {}
+        normalized = {name: VenueAliases.normalize(name, city) for name, city in cities.items()}
+        aliases = dict(session.query(VenueAlias.name, VenueAlias.venue).
+                       filter(VenueAlias.name.in_(set(cities) | set(normalized.values()))))
+        missing = {normalized[name] for name in cities
+                   if name not in aliases and normalized[name] not in aliases}
+        aliases.update(Utils.bulk_get_or_create(session, Venue, missing))
+
+        venue_ids = {name: aliases[name] if name in aliases else aliases[normalized[name]] for name in cities}
+        statement = Utils.insert(session, VenueAlias). \
+            values([{'name': name, 'venue': venue_id} for name, venue_id in sorted(venue_ids.items())]). \
+            on_conflict_do_nothing(index_elements=['name'])
+        session.execute(statement)
+        return venue_ids